@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+from core.async_views import AsyncReadView, paginate
+
+from .serializers import get_recipes_limit
+
+
+class SubscriptionsAsyncView(AsyncReadView):
+    async def handle(self, view):
+        authors = view.get_queryset()
+        page = await paginate(view, authors)
+        data = await sync_to_async(self.serialize_authors)(
+            view,
+            page if page is not None else [obj async for obj in authors],
+        )
+        if page is not None:
+            return view.get_paginated_response(data)
+        return Response(data)
+
+    @staticmethod
+    def serialize_authors(view, authors):
+        view.attach_recipes(authors, get_recipes_limit(view.request))
+        return view.get_serializer(authors, many=True).data
@@ -2,6 +2,7 @@ from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 
 from core.fields import Base64ImageField
+from core.metrics import SerializerMetricsMixin
 
 from users.models import Subscription
 
@@ -36,11 +37,46 @@ class CustomTokenCreateSerializer(serializers.Serializer):
         return attrs
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+def get_subscribed_author_ids(request):
+    """
+    Id авторов, на которых подписан пользователь запроса.
+
+    Загружаются одним запросом и кешируются на объекте запроса,
+    чтобы вложенные сериализаторы не обращались к базе для каждой строки.
+    """
+    if not request or not request.user.is_authenticated:
+        return frozenset()
+    author_ids = getattr(request, "_subscribed_author_ids", None)
+    if author_ids is None:
+        author_ids = frozenset(
+            Subscription.objects.filter(user=request.user).values_list(
+                "author_id", flat=True
+            )
+        )
+        request._subscribed_author_ids = author_ids
+    return author_ids
+
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit или None, если он не задан."""
+    try:
+        recipes_limit = int(request.query_params["recipes_limit"])
+    except (AttributeError, KeyError, ValueError, TypeError):
+        return None
+    return recipes_limit if recipes_limit >= 0 else None
+
+
+class IsSubscribedMixin:
+    def get_is_subscribed(self, obj):
+        return obj.id in get_subscribed_author_ids(self.context.get("request"))
+
+
+class SubscriptionSerializer(SerializerMetricsMixin, IsSubscribedMixin,
+                             serializers.ModelSerializer):
     avatar = serializers.ImageField(required=False, allow_null=True)
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -59,33 +95,21 @@ class SubscriptionSerializer(serializers.ModelSerializer):
     def get_recipes(self, obj):
         from recipes.serializers import ShortRecipeSerializer
 
-        request = self.context.get("request")
-        recipes_limit = request.query_params.get("recipes_limit")
-
-        recipes = obj.recipes.all()
-        if recipes_limit:
-            try:
-                recipes = recipes[: int(recipes_limit)]
-            except (ValueError, TypeError):
-                pass
+        if hasattr(obj, "limited_recipes"):
+            recipes = obj.limited_recipes
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(self.context.get("request"))
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
 
         return ShortRecipeSerializer(
             recipes, many=True, context=self.context
         ).data
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user, author=obj
-            ).exists()
-        return False
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
 
-
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializerMetricsMixin, IsSubscribedMixin,
+                     serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.ImageField(required=False, allow_null=True)
@@ -103,14 +127,6 @@ class UserSerializer(serializers.ModelSerializer):
             "avatar",
         )
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user, author=obj
-            ).exists()
-        return False
-
 
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
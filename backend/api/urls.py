@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from core.views import MetricsView
+
+from .async_views import SubscriptionsAsyncView
 from .views import CustomUserViewSet, SubscribeView, SubscriptionsListView
+from jobs.views import JobStatusView
+from recipes.async_views import (CatalogAsyncView, IngredientAsyncView,
+                                 RecipeAsyncView)
 from recipes.views import (DownloadCartView, FavoriteView, IngredientViewSet,
                            RecipeViewSet, ShoppingCartView, TagViewSet)
 
@@ -28,5 +35,57 @@ urlpatterns = [
         DownloadCartView.as_view(),
         name="download_shopping_cart",
     ),
+    path("jobs/<int:pk>/", JobStatusView.as_view(), name="job_status"),
+    path("_metrics", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Те же адреса, но GET обслуживается асинхронно; остальные методы
+    # и неподдерживаемые запросы передаются представлениям DRF. Имена
+    # совпадают с маршрутами роутера, в том числе для метрик.
+    list_actions = {"get": "list", "post": "create"}
+    detail_actions = {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    }
+    urlpatterns = [
+        path(
+            "users/subscriptions/",
+            SubscriptionsAsyncView.as_view(SubscriptionsListView),
+            name="subscriptions",
+        ),
+        path(
+            "tags/",
+            CatalogAsyncView.as_view(TagViewSet, {"get": "list"}),
+            name="tags-list",
+        ),
+        path(
+            "tags/<int:pk>/",
+            CatalogAsyncView.as_view(TagViewSet, {"get": "retrieve"}),
+            name="tags-detail",
+        ),
+        path(
+            "ingredients/",
+            IngredientAsyncView.as_view(IngredientViewSet, {"get": "list"}),
+            name="ingredients-list",
+        ),
+        path(
+            "ingredients/<int:pk>/",
+            IngredientAsyncView.as_view(
+                IngredientViewSet, {"get": "retrieve"}),
+            name="ingredients-detail",
+        ),
+        path(
+            "recipes/",
+            RecipeAsyncView.as_view(RecipeViewSet, list_actions),
+            name="recipes-list",
+        ),
+        path(
+            "recipes/<int:pk>/",
+            RecipeAsyncView.as_view(RecipeViewSet, detail_actions),
+            name="recipes-detail",
+        ),
+    ] + urlpatterns
@@ -1,16 +1,23 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.pagination import LimitPageNumberPagination
+from core.pagination import LimitPageOrCursorPagination
+from core.parsers import RawImageUploadParser
 
 from .serializers import (AvatarSerializer, SetPasswordSerializer,
                           SubscriptionSerializer, UserCreateSerializer,
-                          UserSerializer)
+                          UserSerializer, get_recipes_limit)
+from recipes.models import Recipe
 from users.models import Subscription
 
 User = get_user_model()
@@ -60,16 +67,24 @@ class SubscribeView(APIView):
 class SubscriptionsListView(GenericAPIView):
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = LimitPageNumberPagination
+    pagination_class = LimitPageOrCursorPagination
+    cursor_ordering = ("id",)
+
+    def get_queryset(self):
+        return User.objects.filter(
+            id__in=Subscription.objects.filter(
+                user=self.request.user
+            ).values_list("author_id", flat=True)
+        ).order_by("id")
 
     def get(self, request):
-        authors = User.objects.filter(
-            id__in=Subscription.objects.filter(user=request.user).values_list(
-                "author_id", flat=True
-            )
-        )
+        authors = self.get_queryset()
 
         page = self.paginate_queryset(authors)
+        self.attach_recipes(
+            page if page is not None else authors,
+            get_recipes_limit(request),
+        )
         serializer = self.get_serializer(
             page if page is not None else authors,
             many=True,
@@ -81,6 +96,33 @@ class SubscriptionsListView(GenericAPIView):
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def attach_recipes(authors, recipes_limit):
+        """
+        Загружает рецепты всех авторов страницы одним запросом.
+
+        Лимит на автора применяется через ROW_NUMBER() с разбиением
+        по автору, результат сохраняется в author.limited_recipes.
+        """
+        authors = list(authors)
+        recipes = Recipe.objects.filter(
+            author__in=authors).only("id", "name", "image", "cooking_time",
+                                     "author_id")
+        if recipes_limit is not None:
+            recipes = recipes.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("author_id")],
+                    order_by=[F("pub_date").desc(), F("id").desc()],
+                )
+            ).filter(row_number__lte=recipes_limit)
+
+        recipes_by_author = defaultdict(list)
+        for recipe in recipes.order_by("-pub_date", "-id"):
+            recipes_by_author[recipe.author_id].append(recipe)
+        for author in authors:
+            author.limited_recipes = recipes_by_author[author.id]
+
 
 class CustomUserViewSet(
     mixins.ListModelMixin,
@@ -110,12 +152,21 @@ class CustomUserViewSet(
         detail=False,
         permission_classes=[permissions.IsAuthenticated],
         url_path="me/avatar",
+        parser_classes=[
+            JSONParser,
+            MultiPartParser,
+            FormParser,
+            RawImageUploadParser,
+        ],
     )
     def avatar(self, request):
         user = request.user
 
         if request.method == "PUT":
-            serializer = AvatarSerializer(user, data=request.data)
+            data = request.data
+            if "file" in data and "avatar" not in data:
+                data = {"avatar": data["file"]}
+            serializer = AvatarSerializer(user, data=data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
             avatar_url = (
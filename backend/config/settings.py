@@ -16,6 +16,11 @@ DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
 
+# "asgi" — запуск под uvicorn (см. gunicorn.conf.py) с async-версиями
+# основных GET-ручек API.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+ASYNC_VIEWS = SERVER_MODE == "asgi"
+
 
 # Application definition
 
@@ -26,6 +31,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "django_filters",
@@ -34,9 +40,11 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "recipes.apps.RecipesConfig",
     "api.apps.ApiConfig",
+    "jobs.apps.JobsConfig",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -1,8 +1,14 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import rendition_view
+
+from recipes.views import short_link_redirect
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
+    path("media/renditions/<path:path>", rendition_view, name="rendition"),
+    path("r/<str:code>/", short_link_redirect, name="short-link"),
 ]
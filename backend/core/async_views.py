@@ -0,0 +1,190 @@
+"""
+Асинхронные GET-ручки поверх представлений DRF для ASGI-сервера.
+
+DRF 3.14 не поддерживает async-представления, поэтому AsyncReadView
+создаёт экземпляр обычного представления DRF и использует его код
+(запросы, фильтры, сериализаторы, пагинацию, права), а обращения
+к базе на основном пути — аутентификация по токену, валидаторы ETag,
+подсчёт и выборка страницы — выполняются через async ORM. Сериализация,
+которая может догружать связанные объекты, выполняется в потоке.
+
+Ошибки (404, 401/403, ошибки валидации) превращаются в ответ тем же
+handle_exception() представления DRF, без повторного выполнения
+запроса. Всё, что быстрый путь не поддерживает (другие методы,
+курсорная пагинация, не-JSON ответы), передаётся синхронному
+представлению, поэтому ответы совпадают с обычным режимом.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from .conditional import get_not_modified_response, set_validators
+from .pagination import LimitPageOrCursorPagination
+
+
+class Fallback(Exception):
+    """Запрос нужно обработать синхронным представлением."""
+
+
+async def authenticate(request):
+    """
+    Пользователь и токен по заголовку «Authorization: Token <key>»,
+    как в TokenAuthentication, с теми же сообщениями об ошибках.
+    """
+    header = request.headers.get("Authorization", "").split()
+    if not header or header[0].lower() != "token":
+        return AnonymousUser(), None
+    if len(header) == 1:
+        raise AuthenticationFailed(
+            _("Invalid token header. No credentials provided."))
+    if len(header) > 2:
+        raise AuthenticationFailed(
+            _("Invalid token header. "
+              "Token string should not contain spaces."))
+    token = await Token.objects.select_related("user").filter(
+        key=header[1]).afirst()
+    if token is None:
+        raise AuthenticationFailed(_("Invalid token."))
+    if not token.user.is_active:
+        raise AuthenticationFailed(_("User inactive or deleted."))
+    return token.user, token
+
+
+async def paginate(view, queryset):
+    """
+    Страница queryset через async ORM. Возвращает None, если пагинация
+    отключена; ответ строит пагинатор представления, как обычно.
+    """
+    paginator = view.paginator
+    if paginator is None:
+        return None
+    request = view.request
+    if not isinstance(paginator, PageNumberPagination):
+        raise Fallback
+    if isinstance(paginator, LimitPageOrCursorPagination):
+        if paginator.cursor_query_param in request.query_params:
+            raise Fallback
+        paginator.cursor_paginator = None
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    if page_number in paginator.last_page_strings:
+        page_number = django_paginator.num_pages
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage:
+        raise Fallback
+    page.object_list = [obj async for obj in page.object_list]
+    paginator.page = page
+    paginator.request = request
+    return page.object_list
+
+
+class AsyncReadView(View):
+    """
+    Асинхронный GET для представления DRF view_class.
+
+    Подклассы реализуют handle(view, **kwargs) и возвращают
+    rest_framework.response.Response.
+    """
+
+    view_class = None
+    actions = None
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, view_class, actions=None):
+        sync_view = (
+            view_class.as_view(actions) if actions else view_class.as_view()
+        )
+        view = super().as_view(
+            view_class=view_class, actions=actions, sync_view=sync_view
+        )
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method == "GET":
+            try:
+                return await self.get(request, *args, **kwargs)
+            except Fallback:
+                pass
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        view = self.make_view(request, *args, **kwargs)
+        try:
+            await self.initial(view)
+            response = await self.handle(view, **kwargs)
+        except (APIException, Http404, PermissionDenied) as exc:
+            # Как APIView.dispatch(): ответ с ошибкой строит DRF.
+            response = view.handle_exception(exc)
+        response = view.finalize_response(view.request, response)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    def make_view(self, request, *args, **kwargs):
+        view = self.view_class()
+        if self.actions:
+            # Как ViewSetMixin.as_view(): методы HTTP указывают на действия.
+            view.action_map = self.actions
+            view.action = self.actions["get"]
+            for method, action in self.actions.items():
+                setattr(view, method, getattr(view, action))
+        view.setup(request, *args, **kwargs)
+        view.format_kwarg = view.get_format_suffix(**kwargs)
+        view.headers = view.default_response_headers
+        view.request = view.initialize_request(request, *args, **kwargs)
+        return view
+
+    async def initial(self, view):
+        """Выбор рендерера, аутентификация и права, как APIView.initial()."""
+        drf_request = view.request
+        renderer, media_type = view.perform_content_negotiation(drf_request)
+        if renderer.format != "json":
+            raise Fallback
+        drf_request.accepted_renderer = renderer
+        drf_request.accepted_media_type = media_type
+        try:
+            drf_request.user, drf_request.auth = await authenticate(
+                drf_request._request)
+        except AuthenticationFailed:
+            # Как Request._not_authenticated(): иначе обращение
+            # к request.user запустило бы синхронную аутентификацию.
+            drf_request.user, drf_request.auth = AnonymousUser(), None
+            raise
+        view.check_permissions(drf_request)
+
+    async def handle(self, view, **kwargs):
+        raise NotImplementedError
+
+    async def conditional(self, view, handler, **kwargs):
+        """Условный GET с валидаторами view.aget_validators()."""
+        etag, last_modified = await view.aget_validators(
+            view.request, **kwargs)
+        response = get_not_modified_response(
+            view.request, etag, last_modified)
+        if response is None:
+            response = await handler(view, **kwargs)
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
+
+    @staticmethod
+    async def serialize(view, instance, many=False):
+        return await sync_to_async(
+            lambda: view.get_serializer(instance, many=many).data
+        )()
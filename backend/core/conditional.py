@@ -0,0 +1,74 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Сильный валидатор из произвольных значений."""
+    digest = hashlib.md5(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """Ответ 304/412, если копия клиента актуальна, иначе None."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+
+
+def set_validators(response, etag, last_modified):
+    timestamp = _timestamp(last_modified)
+    if etag:
+        response["ETag"] = etag
+    if timestamp:
+        response["Last-Modified"] = http_date(timestamp)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов (If-None-Match / If-Modified-Since).
+
+    Представление возвращает валидаторы из get_validators() — они должны
+    вычисляться дешевле, чем сам ответ. Если клиентская копия актуальна,
+    отвечаем 304 без запроса данных и сериализации.
+    """
+
+    conditional_actions = ("list", "retrieve")
+
+    def get_validators(self, request, *args, **kwargs):
+        """Пара (etag, last_modified); любое значение может быть None."""
+        return None, None
+
+    async def aget_validators(self, request, *args, **kwargs):
+        """Асинхронный вариант get_validators() для async-представлений."""
+        return await sync_to_async(self.get_validators)(
+            request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        response = get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        if "list" not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional(super().retrieve, request, *args, **kwargs)
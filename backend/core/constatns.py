@@ -1,8 +1,28 @@
 MAX_NAME_LENGTH = 200
 MAX_SLUG_LENGTH = 200
 MAX_MEASUREMENT_UNIT_LENGTH = 50
+MAX_SHORT_CODE_LENGTH = 32
 
 MAX_USER_NAME_LENGTH = 150
 MAX_EMAIL_LENGTH = 254
 
 MAX_PAGE_SIZE = 100
+
+SEARCH_CONFIG = "russian"
+
+RECIPE_CACHE_TIMEOUT = 60 * 60
+
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 25_000_000
+
+RENDITION_PREFIX = "renditions/"
+RENDITION_SOURCES = ("recipes/images/", "users/avatars/")
+RENDITION_WIDTHS = (160, 320, 640, 1280)
+# Одновременных построений вариантов по запросу в одном процессе.
+RENDITION_CONCURRENCY = 2
+
+SHORT_CODE_LENGTH = 8
+SHORT_LINK_CACHE_SIZE = 10_000
+# Сколько секунд другой процесс может вести по старой короткой ссылке
+# после её изменения или удаления в админке.
+SHORT_LINK_CACHE_TTL = 60
@@ -0,0 +1,65 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class CounterFieldsMixin:
+    """
+    Модель со счётчиками, которые меняет только change_counter().
+
+    Полное save() существующего объекта сохраняет все поля, кроме
+    counter_fields: иначе устаревшее значение из памяти затёрло бы
+    атомарные F()-инкременты сигналов. Вставка не меняется.
+    """
+
+    counter_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if (update_fields is None and not force_insert
+                and not self._state.adding):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счётчик, не опуская его ниже нуля."""
+    objects = model.objects.filter(pk=pk)
+    if delta < 0:
+        objects = objects.filter(**{f"{field}__gte": -delta})
+    objects.update(**{field: F(field) + delta})
+
+
+def reconcile_counter(model, field, related_model, related_field):
+    """
+    Пересчитывает счётчик model.field как число строк related_model,
+    ссылающихся на объект через related_field. Обновляются только
+    расходящиеся строки; возвращается их количество.
+    """
+    actual = Coalesce(
+        Subquery(
+            related_model.objects.filter(**{related_field: OuterRef("pk")})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    return (
+        model.objects.annotate(actual=actual)
+        .exclude(**{field: F("actual")})
+        .update(**{field: actual})
+    )
@@ -3,16 +3,78 @@ import uuid
 from io import BytesIO
 
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
 from PIL import Image
 from rest_framework import serializers
 
+from . import renditions
+from .constatns import MAX_IMAGE_PIXELS, MAX_IMAGE_SIZE
+
+ALLOWED_FORMATS = {"jpeg", "png"}
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "jpeg",
+    b"\x89PNG\r\n\x1a\n": "png",
+}
+
+
+def check_image(stream, size):
+    """
+    Проверяет изображение по заголовку, не декодируя пиксели.
+
+    Формат определяется по сигнатуре первых байтов, размеры —
+    из заголовка (Image.open читает только его). Возвращает формат.
+    """
+    if size > MAX_IMAGE_SIZE:
+        raise serializers.ValidationError(
+            f"Файл больше {MAX_IMAGE_SIZE // (1024 * 1024)} МБ.")
+
+    header = stream.read(8)
+    stream.seek(0)
+    file_ext = next(
+        (
+            ext
+            for signature, ext in IMAGE_SIGNATURES.items()
+            if header.startswith(signature)
+        ),
+        None,
+    )
+    if file_ext is None:
+        raise serializers.ValidationError(
+            "Допустимы только изображения в форматах: "
+            f'{", ".join(sorted(ALLOWED_FORMATS))}.'
+        )
+
+    try:
+        with Image.open(stream) as image:
+            width, height = image.size
+    except Exception:
+        raise serializers.ValidationError(
+            "Файл не является допустимым изображением."
+        )
+    finally:
+        stream.seek(0)
+
+    if width * height > MAX_IMAGE_PIXELS:
+        raise serializers.ValidationError(
+            f"Слишком большое изображение: {width}x{height}.")
+    return file_ext
+
 
 class Base64ImageField(serializers.ImageField):
+    """
+    Изображение строкой data:image/...;base64,... в JSON
+    или файлом (multipart/form-data либо тело запроса целиком).
+    """
 
     def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            file_ext = check_image(data, data.size)
+            data.name = f"{uuid.uuid4()}.{file_ext}"
+            return super().to_internal_value(data)
+
         if not isinstance(data, str):
             raise serializers.ValidationError(
-                "Аватар должен быть строкой в формате base64."
+                "Ожидалась base64-строка изображения или файл."
             )
 
         if not data.startswith("data:image"):
@@ -23,36 +85,30 @@ class Base64ImageField(serializers.ImageField):
         try:
             format_info, img_str = data.split(";base64,")
             ext = format_info.split("/")[-1].lower()
-            decoded_file = base64.b64decode(img_str)
-        except (ValueError, TypeError, base64.binascii.Error):
+        except (ValueError, TypeError):
             raise serializers.ValidationError(
                 "Ошибка декодирования изображения.")
 
-        try:
-            image = Image.open(BytesIO(decoded_file))
-            file_ext = image.format.lower()
-        except Exception:
-            raise serializers.ValidationError(
-                "Файл не является допустимым изображением."
-            )
-
         if ext == "jpg":
             ext = "jpeg"
-        if file_ext == "jpg":
-            file_ext = "jpeg"
 
-        allowed_formats = {"jpeg", "png"}
-        if ext not in allowed_formats:
+        if ext not in ALLOWED_FORMATS:
             raise serializers.ValidationError(
                 f"Недопустимый формат: {ext}. "
-                f'Разрешены только: {", ".join(allowed_formats)}.'
+                f'Разрешены только: {", ".join(ALLOWED_FORMATS)}.'
             )
 
-        if file_ext not in allowed_formats:
+        if len(img_str) * 3 // 4 > MAX_IMAGE_SIZE:
             raise serializers.ValidationError(
-                f"Недопустимый определённый формат файла: {file_ext}. "
-                f'Разрешены только: {", ".join(allowed_formats)}.'
-            )
+                f"Файл больше {MAX_IMAGE_SIZE // (1024 * 1024)} МБ.")
+
+        try:
+            decoded_file = base64.b64decode(img_str)
+        except (ValueError, TypeError, base64.binascii.Error):
+            raise serializers.ValidationError(
+                "Ошибка декодирования изображения.")
+
+        file_ext = check_image(BytesIO(decoded_file), len(decoded_file))
 
         if file_ext != ext:
             raise serializers.ValidationError(
@@ -68,3 +124,35 @@ class Base64ImageField(serializers.ImageField):
         data = ContentFile(decoded_file, name=file_name)
 
         return super().to_internal_value(data)
+
+
+class ImageSrcSetField(serializers.Field):
+    """
+    Ссылки на варианты изображения в формате srcset:
+    {"webp": "url 160w, url 320w, ...", "jpg": "..."}.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get("request")
+        build_url = request.build_absolute_uri if request else str
+        return renditions.get_srcset(value.name, build_url)
+
+
+class SrcSetMixin:
+    """
+    Поле image_srcset отдаётся только по запросу (?srcset=1),
+    чтобы не менять формат ответов для существующих клиентов.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if not request or not request.query_params.get("srcset"):
+            fields.pop("image_srcset", None)
+        return fields
@@ -1,5 +1,11 @@
 import django_filters
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
 
+from .constatns import SEARCH_CONFIG
 from recipes.models import Ingredient, Recipe
 
 
@@ -39,3 +45,35 @@ class IngredientFilter(django_filters.FilterSet):
     class Meta:
         model = Ingredient
         fields = ["name"]
+
+
+class RecipeSearchFilter(SearchFilter):
+    """
+    Поиск рецептов по ?search=.
+
+    В PostgreSQL — полнотекстовый поиск по названию и описанию
+    с русской морфологией плюс нечёткое (триграммное) совпадение
+    названия; результаты упорядочены по релевантности. На других
+    СУБД используется стандартный поиск DRF по search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search = " ".join(self.get_search_terms(request))
+        if not search or connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(
+            search, config=SEARCH_CONFIG, search_type="websearch")
+        vector = SearchVector("name", "text", config=SEARCH_CONFIG)
+        condition = Q(search_vector=query) | Q(name__trigram_similar=search)
+        if search.isdigit():
+            condition |= Q(author__id=search)
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(condition)
+            .annotate(
+                rank=SearchRank(vector, query)
+                + TrigramSimilarity("name", search)
+            )
+            .order_by("-rank", "-pub_date")
+        )
@@ -0,0 +1,173 @@
+"""
+Метрики запросов в формате Prometheus.
+
+Для каждого маршрута (имени URL) собираются число запросов, время
+ответа, число и время SQL-запросов, время сериализации и размер ответа.
+SQL-запросы считает обёртка execute_wrapper, которая ставится на каждое
+новое соединение с базой и пишет в статистику текущего запроса из
+contextvar, поэтому она работает и в потоках sync_to_async.
+
+Под gunicorn значения хранятся в файлах PROMETHEUS_MULTIPROC_DIR
+(см. gunicorn.conf.py) и суммируются по всем воркерам при выдаче.
+"""
+import contextvars
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+LABELS = ("route", "method")
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "foodgram_http_requests_total",
+    "Число обработанных запросов.",
+    (*LABELS, "status"),
+)
+LATENCY = Histogram(
+    "foodgram_http_request_duration_seconds",
+    "Время обработки запроса.",
+    LABELS,
+)
+DB_QUERIES = Histogram(
+    "foodgram_http_db_queries",
+    "Число SQL-запросов на один запрос.",
+    LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, float("inf")),
+)
+DB_DURATION = Histogram(
+    "foodgram_http_db_duration_seconds",
+    "Время выполнения SQL-запросов за один запрос.",
+    LABELS,
+)
+SERIALIZER_DURATION = Histogram(
+    "foodgram_http_serializer_duration_seconds",
+    "Время сериализации ответа без учёта SQL.",
+    LABELS,
+)
+RESPONSE_SIZE = Histogram(
+    "foodgram_http_response_size_bytes",
+    "Размер тела ответа.",
+    LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576,
+             float("inf")),
+)
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+current_stats = contextvars.ContextVar("current_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+for connection in connections.all(initialized_only=True):
+    install_query_wrapper(None, connection)
+
+
+class SerializerMetricsMixin:
+    """
+    Учитывает время to_representation в метриках запроса. Вложенные
+    сериализаторы не считаются повторно, SQL-запросы внутри
+    сериализации вычитаются.
+    """
+
+    def to_representation(self, instance):
+        stats = current_stats.get()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started, sql_time = time.perf_counter(), stats.sql_time
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializing = False
+            stats.serializer_time += (
+                time.perf_counter() - started - (stats.sql_time - sql_time)
+            )
+
+
+def get_route(request):
+    match = request.resolver_match
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.url_name and match.view_name or match.route
+
+
+def observe(request, response, stats, duration):
+    labels = (get_route(request), request.method)
+    REQUESTS.labels(*labels, response.status_code).inc()
+    LATENCY.labels(*labels).observe(duration)
+    DB_QUERIES.labels(*labels).observe(stats.queries)
+    DB_DURATION.labels(*labels).observe(stats.sql_time)
+    SERIALIZER_DURATION.labels(*labels).observe(stats.serializer_time)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats = RequestStats()
+            token = current_stats.set(stats)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                current_stats.reset(token)
+            observe(request, response, stats, time.perf_counter() - started)
+            return response
+    else:
+        def middleware(request):
+            stats = RequestStats()
+            token = current_stats.set(stats)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                current_stats.reset(token)
+            observe(request, response, stats, time.perf_counter() - started)
+            return response
+    return middleware
+
+
+def get_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render():
+    return generate_latest(get_registry())
@@ -1,5 +1,10 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.db import connections
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from .constatns import MAX_PAGE_SIZE
 
@@ -17,3 +22,94 @@ class LimitPageNumberPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+def get_approximate_count(queryset):
+    """
+    Оценка числа строк по плану запроса PostgreSQL (без COUNT(*)).
+
+    На других СУБД возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class LimitCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация без COUNT(*) и OFFSET.
+
+    Порядок берётся из метода представления get_cursor_ordering(),
+    если он есть, иначе из атрибута cursor_ordering.
+    С ?count=approx в ответ добавляется приблизительное число записей.
+    """
+
+    page_size_query_param = "limit"
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ("-id",)
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, "get_cursor_ordering"):
+            return tuple(view.get_cursor_ordering())
+        return tuple(getattr(view, "cursor_ordering", self.ordering))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get("count") == "approx":
+            self.count = get_approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+
+class LimitPageOrCursorPagination(LimitPageNumberPagination):
+    """
+    По умолчанию — постраничная пагинация ?page=&limit=.
+
+    Если в запросе есть параметр cursor (в том числе пустой — первая
+    страница), используется LimitCursorPagination.
+
+    Курсор несовместим с поиском ?search= у представлений с
+    search_fields: курсор задаёт свой порядок и отбросил бы сортировку
+    по релевантности. Такой запрос отклоняется, для поиска остаётся
+    постраничная пагинация.
+    """
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        if (getattr(view, "search_fields", None)
+                and request.query_params.get(api_settings.SEARCH_PARAM)):
+            raise ValidationError({
+                self.cursor_query_param: (
+                    "Курсорная пагинация недоступна вместе с поиском, "
+                    "используйте page и limit."
+                )
+            })
+        self.cursor_paginator = LimitCursorPagination()
+        self.cursor_paginator.page_size = self.page_size
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
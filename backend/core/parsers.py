@@ -0,0 +1,20 @@
+from rest_framework.parsers import FileUploadParser
+
+
+class RawImageUploadParser(FileUploadParser):
+    """
+    Изображение в теле запроса как есть (Content-Type: image/png и т.п.).
+
+    Тело потоково записывается обработчиками загрузки Django (большие
+    файлы — во временный файл) и попадает в request.data["file"].
+    Имя файла необязательно: без Content-Disposition оно берётся
+    из типа содержимого.
+    """
+
+    media_type = "image/*"
+
+    def get_filename(self, stream, media_type, parser_context):
+        filename = super().get_filename(stream, media_type, parser_context)
+        if filename:
+            return filename
+        return "upload." + media_type.split("/")[-1].split(";")[0].strip()
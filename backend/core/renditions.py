@@ -0,0 +1,166 @@
+"""
+Варианты изображений (рендишены) для отдачи напрямую через nginx.
+
+Для каждого загруженного изображения фоновая задача (см. jobs)
+строит уменьшенные копии шириной RENDITION_WIDTHS в форматах WebP
+и прогрессивный JPEG, без метаданных. Файлы лежат в MEDIA_ROOT:
+
+    renditions/<путь оригинала>/<ширина>.<формат>
+
+nginx отдаёт их как обычные медиафайлы, а отсутствующие передаёт
+в core.views.rendition_view, которая строит их по первому запросу.
+"""
+import os
+import posixpath
+import tempfile
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .constatns import RENDITION_PREFIX, RENDITION_SOURCES, RENDITION_WIDTHS
+
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "progressive": True, "optimize": True}),
+}
+
+
+def get_rendition_name(name, width, fmt):
+    return f"{RENDITION_PREFIX}{name}/{width}.{fmt}"
+
+
+def parse_rendition_name(path):
+    """
+    (имя оригинала, ширина, формат) по пути рендишена.
+
+    Бросает ValueError для путей, которые не могут быть рендишенами
+    (другая ширина или формат, выход за пределы разрешённых папок).
+    """
+    path = posixpath.normpath(path)
+    if not path.startswith(RENDITION_PREFIX) or ".." in path.split("/"):
+        raise ValueError(path)
+    name, file_name = posixpath.split(path[len(RENDITION_PREFIX):])
+    width, _, fmt = file_name.partition(".")
+    if (
+        not name.startswith(RENDITION_SOURCES)
+        or fmt not in RENDITION_FORMATS
+        or not width.isdigit()
+        or int(width) not in RENDITION_WIDTHS
+    ):
+        raise ValueError(path)
+    return name, int(width), fmt
+
+
+def get_srcset(name, build_url):
+    """{формат: "url 320w, url 640w, ..."} для изображения name."""
+    return {
+        fmt: ", ".join(
+            "{} {}w".format(
+                build_url(
+                    default_storage.url(get_rendition_name(name, width, fmt))
+                ),
+                width,
+            )
+            for width in RENDITION_WIDTHS
+        )
+        for fmt in RENDITION_FORMATS
+    }
+
+
+def is_file_changed(instance, field, update_fields=None):
+    """
+    Меняется ли файл в поле field при сохранении instance (вызывается
+    из pre_save). Имя сравнивается с сохранённым в базе, чтобы полное
+    сохранение модели без нового файла не ставило задачу повторно.
+    """
+    if update_fields is not None and field not in update_fields:
+        return False
+    name = getattr(instance, field).name or ""
+    if instance._state.adding:
+        return bool(name)
+    stored = (
+        type(instance)._default_manager.filter(pk=instance.pk)
+        .values_list(field, flat=True)
+        .first()
+    )
+    return (stored or "") != name
+
+
+def render(image, width, fmt):
+    image_format, options = RENDITION_FORMATS[fmt]
+    image = image.copy()
+    # thumbnail сохраняет пропорции и не увеличивает изображение.
+    image.thumbnail((width, image.height))
+    if image.mode not in ("RGB", "RGBA") or image_format == "JPEG":
+        image = image.convert("RGB")
+    # Сохраняем без exif/icc: метаданные в вариантах не нужны.
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def generate(name, only=None, force=False):
+    """
+    Строит варианты изображения name. only — (ширина, формат)
+    для построения одного варианта. Возвращает список имён файлов.
+    """
+    targets = [only] if only else [
+        (width, fmt)
+        for width in RENDITION_WIDTHS
+        for fmt in RENDITION_FORMATS
+    ]
+    if not force:
+        targets = [
+            (width, fmt)
+            for width, fmt in targets
+            if not default_storage.exists(
+                get_rendition_name(name, width, fmt))
+        ]
+    if not targets:
+        return []
+
+    with default_storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    created = []
+    for width, fmt in targets:
+        rendition_name = get_rendition_name(name, width, fmt)
+        created.append(save(rendition_name, render(image, width, fmt)))
+    return created
+
+
+def save(name, content):
+    """
+    Записывает вариант name целиком: во временный файл рядом и
+    os.replace() поверх. Параллельные построения одного варианта
+    (первые запросы и фоновая задача) не создают файлов с суффиксом,
+    а читатель видит либо прежний файл, либо новый — но не пропажу.
+    Хранилищам без локальных путей остаётся удаление и запись.
+    """
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        return default_storage.save(name, ContentFile(content))
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+        os.chmod(
+            temp_path,
+            getattr(default_storage, "file_permissions_mode", None) or 0o644,
+        )
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return name
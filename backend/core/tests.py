@@ -0,0 +1,53 @@
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from . import renditions
+
+MEDIA_ROOT = tempfile.mkdtemp()
+IMAGE_NAME = "recipes/images/source.png"
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionTest(SimpleTestCase):
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), (90, 160, 60)).save(buffer, "PNG")
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def get_files(self):
+        directory = os.path.join(
+            MEDIA_ROOT, renditions.RENDITION_PREFIX, IMAGE_NAME)
+        return sorted(os.listdir(directory))
+
+    def test_view_builds_rendition(self):
+        response = self.client.get(f"/media/renditions/{IMAGE_NAME}/320.webp")
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) \
+                as image:
+            self.assertEqual(image.size, (320, 240))
+        self.assertEqual(self.get_files(), ["320.webp"])
+
+    def test_concurrent_rebuilds_replace_file(self):
+        def rebuild(number):
+            renditions.generate(IMAGE_NAME, only=(160, "jpg"), force=True)
+            with default_storage.open(
+                    renditions.get_rendition_name(IMAGE_NAME, 160, "jpg")) \
+                    as file:
+                return len(file.read())
+
+        with ThreadPoolExecutor(4) as executor:
+            sizes = list(executor.map(rebuild, range(8)))
+        self.assertTrue(all(sizes))
+        # Ни файлов с суффиксом от get_available_name, ни временных.
+        self.assertEqual(self.get_files(), ["160.jpg"])
@@ -0,0 +1,61 @@
+import threading
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework.authentication import (SessionAuthentication,
+                                           TokenAuthentication)
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from . import metrics, renditions
+from .constatns import RENDITION_CONCURRENCY
+
+# Декодирование оригинала дорогое: ограничиваем число одновременных
+# построений в процессе, остальные запросы ждут и берут готовый файл.
+rendition_slots = threading.BoundedSemaphore(RENDITION_CONCURRENCY)
+
+
+def rendition_view(request, path):
+    """
+    Строит отсутствующий вариант изображения по первому запросу.
+
+    nginx передаёт сюда запросы к /media/renditions/, для которых
+    файла ещё нет; дальше он будет отдаваться nginx напрямую.
+    """
+    try:
+        name, width, fmt = renditions.parse_rendition_name(
+            renditions.RENDITION_PREFIX + path)
+    except ValueError:
+        raise Http404
+    if not default_storage.exists(name):
+        raise Http404
+
+    rendition_name = renditions.get_rendition_name(name, width, fmt)
+    # Второй проход — для хранилищ без атомарной замены, где файл
+    # мог исчезнуть между построением и открытием.
+    for attempt in range(2):
+        if not default_storage.exists(rendition_name):
+            with rendition_slots:
+                # generate() заново проверяет, не построен ли файл,
+                # пока запрос ждал.
+                renditions.generate(name, only=(width, fmt))
+        try:
+            return FileResponse(default_storage.open(rendition_name))
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+
+class MetricsView(APIView):
+    """Метрики в формате Prometheus, только для сотрудников."""
+
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Ответ всегда в текстовом формате Prometheus.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=CONTENT_TYPE_LATEST)
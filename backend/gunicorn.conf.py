@@ -0,0 +1,31 @@
+"""
+Настройки gunicorn. SERVER_MODE=asgi запускает приложение через
+воркеры uvicorn и включает асинхронные GET-ручки API.
+"""
+import os
+import shutil
+
+bind = "0.0.0.0:8000"
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+
+if os.getenv("SERVER_MODE", "wsgi") == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
+
+# Метрики Prometheus (core/metrics.py) воркеры пишут в общий каталог.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus")
+
+
+def on_starting(server):
+    # Значения прошлого запуска не должны попасть в новые метрики.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
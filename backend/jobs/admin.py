@@ -0,0 +1,63 @@
+import os
+
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Job
+
+
+def get_result_file(job):
+    """Имя файла, созданного задачей (например, экспортом), или None."""
+    if isinstance(job.result, dict):
+        return job.result.get("file")
+    return None
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "progress", "attempts", "user",
+                    "created_at", "result_file")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = ("created_at", "updated_at", "locked_at",
+                       "result_file")
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="jobs_job_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description="Файл")
+    def result_file(self, obj):
+        name = get_result_file(obj)
+        if not name:
+            return "-"
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse("admin:jobs_job_download", args=[obj.pk]),
+            os.path.basename(name),
+        )
+
+    def download_view(self, request, pk):
+        # Файлы экспорта закрыты в nginx и отдаются только через админку.
+        job = get_object_or_404(Job, pk=pk)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        name = get_result_file(job)
+        if not name or not default_storage.exists(name):
+            raise Http404
+        return FileResponse(
+            default_storage.open(name, "rb"),
+            as_attachment=True,
+            filename=os.path.basename(name),
+        )
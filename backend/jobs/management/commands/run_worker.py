@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи из очереди в базе данных."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sleep", type=float, default=1.0,
+            help="Пауза между опросами пустой очереди, секунд.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Выполнить готовые задачи и завершиться.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            "Зарегистрированные задачи: " + ", ".join(sorted(queue.registry)))
+        while True:
+            close_old_connections()
+            queue.requeue_stale()
+            job = queue.claim()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+            job = queue.run(job)
+            self.stdout.write(f"{job}")
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    ]
+
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    payload = models.JSONField(default=dict, verbose_name="Аргументы")
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name="Максимум попыток")
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name="Не раньше")
+    locked_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Взята в работу")
+    progress = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Прогресс, %")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        verbose_name="Пользователь",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Создана")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменена")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="job_status_run_after_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
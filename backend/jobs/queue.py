@@ -0,0 +1,131 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Задачи регистрируются декоратором @task в модулях tasks.py приложений
+и ставятся в очередь через enqueue(). Обработчик (manage.py run_worker)
+забирает задачи запросом SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+несколько обработчиков не мешают друг другу и внешний брокер не нужен.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=30)
+
+registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как задачу с именем name."""
+
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(task_name, *, user=None, max_attempts=3, **payload):
+    """
+    Ставит задачу в очередь. Создаётся в текущей транзакции, поэтому
+    обработчик увидит её только после коммита.
+    """
+    if task_name not in registry:
+        raise KeyError(f"Неизвестная задача: {task_name}")
+    return Job.objects.create(
+        name=task_name, payload=payload, user=user, max_attempts=max_attempts
+    )
+
+
+def set_progress(job, progress):
+    job.progress = progress
+    Job.objects.filter(pk=job.pk).update(
+        progress=progress, updated_at=timezone.now())
+
+
+def claim():
+    """Забирает следующую готовую задачу или возвращает None."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.locked_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_at", "attempts",
+                                "updated_at"])
+    return job
+
+
+def run(job):
+    """
+    Выполняет задачу и сохраняет результат или планирует повтор.
+
+    Результат записывается, только если задача всё ещё выполняется
+    по этому захвату (тот же locked_at): иначе её уже вернул в очередь
+    requeue_stale() и она могла достаться другому обработчику.
+    """
+    try:
+        result = registry[job.name](job=job, **job.payload)
+    except Exception:
+        logger.exception("Задача %s завершилась с ошибкой", job)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (
+                job.attempts - 1)
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+        job.progress = 100
+        job.result = result
+    claimed_at, job.locked_at = job.locked_at, None
+    job.updated_at = timezone.now()
+    saved = Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_at=claimed_at
+    ).update(**{
+        field: getattr(job, field)
+        for field in ("status", "run_after", "progress", "result",
+                      "last_error", "locked_at", "updated_at")
+    })
+    if not saved:
+        logger.warning(
+            "Задача %s больше не принадлежит обработчику, "
+            "результат не сохранён", job)
+    return job
+
+
+def requeue_stale():
+    """
+    Возвращает в очередь задачи, обработчик которых пропал: статус
+    RUNNING и ни одного обновления прогресса (updated_at) дольше
+    STALE_AFTER. Задачи, исчерпавшие попытки, помечаются как FAILED,
+    чтобы задача, роняющая обработчик, не забиралась бесконечно.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, updated_at__lt=now - STALE_AFTER)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED,
+        locked_at=None,
+        updated_at=now,
+        last_error="Обработчик пропал во время выполнения задачи.",
+    )
+    return failed + stale.update(
+        status=Job.QUEUED, locked_at=None, updated_at=now)
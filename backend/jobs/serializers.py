@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from core.metrics import SerializerMetricsMixin
+
+from .models import Job
+
+
+class JobSerializer(SerializerMetricsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ("id", "name", "status", "progress", "attempts", "result",
+                  "created_at", "updated_at")
+        read_only_fields = fields
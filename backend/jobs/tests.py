@@ -0,0 +1,54 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+
+@queue.task("jobs.tests.echo")
+def echo(job, value):
+    return value
+
+
+class RequeueStaleTest(TestCase):
+    def make_running(self, attempts, idle):
+        job = queue.enqueue("jobs.tests.echo", value=1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            attempts=attempts,
+            locked_at=timezone.now() - 2 * queue.STALE_AFTER,
+            updated_at=timezone.now() - idle,
+        )
+        return job
+
+    def test_stale_jobs(self):
+        requeued = self.make_running(1, 2 * queue.STALE_AFTER)
+        exhausted = self.make_running(3, 2 * queue.STALE_AFTER)
+        # Давно взята, но сообщает о прогрессе.
+        alive = self.make_running(1, queue.STALE_AFTER / 2)
+        self.assertEqual(queue.requeue_stale(), 2)
+        statuses = dict(Job.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[requeued.pk], Job.QUEUED)
+        self.assertEqual(statuses[exhausted.pk], Job.FAILED)
+        self.assertEqual(statuses[alive.pk], Job.RUNNING)
+
+
+class RunTest(TestCase):
+    def test_result_saved(self):
+        queue.enqueue("jobs.tests.echo", value=5)
+        job = queue.run(queue.claim())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, 5)
+        self.assertIsNone(job.locked_at)
+
+    def test_lost_claim_not_overwritten(self):
+        queue.enqueue("jobs.tests.echo", value=5)
+        job = queue.claim()
+        # Задачу вернули в очередь, и её забрал другой обработчик.
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() + queue.STALE_AFTER)
+        queue.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(job.result)
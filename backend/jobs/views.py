@@ -0,0 +1,15 @@
+from rest_framework import permissions
+from rest_framework.generics import RetrieveAPIView
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobStatusView(RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(user=self.request.user)
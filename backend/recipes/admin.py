@@ -1,11 +1,85 @@
 from django import forms
-from django.contrib import admin
-from django.core.exceptions import ValidationError
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 
+from . import imports
 from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
-from .resources import IngredientResource, TagResource
+                     ShoppingCart, ShortLink, Tag)
+from .resources import IngredientResource, RecipeResource, TagResource
+from jobs.queue import enqueue
+
+
+def get_class_path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+class BackgroundImportExportAdmin(ImportExportModelAdmin):
+    """
+    Импорт и экспорт выполняются обработчиком очереди задач,
+    а не внутри запроса к админке. Прогресс виден в «Фоновых задачах».
+    """
+
+    def import_action(self, request, **kwargs):
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+        import_form = self.create_import_form(request)
+        if not (request.POST and import_form.is_valid()):
+            return super().import_action(request, **kwargs)
+
+        input_format = self.get_import_formats()[
+            int(import_form.cleaned_data["format"])
+        ]
+        resource_class = self.choose_import_resource_class(
+            import_form, request)
+        job = enqueue(
+            "recipes.import_data",
+            user=request.user,
+            max_attempts=1,
+            resource=get_class_path(resource_class),
+            path=imports.save_upload(import_form.cleaned_data["import_file"]),
+            input_format=input_format.__name__,
+            encoding=self.from_encoding,
+        )
+        return self.job_started(request, job, "Импорт")
+
+    def _do_file_export(self, file_format, request, queryset,
+                        export_form=None):
+        resource_class = self.choose_export_resource_class(
+            export_form, request)
+        # Без фильтров и выбранных записей выгружается вся таблица,
+        # и список id в задачу не передаётся.
+        filtered = request.GET or "export_items" in request.POST
+        job = enqueue(
+            "recipes.export_data",
+            user=request.user,
+            resource=get_class_path(resource_class),
+            file_format=type(file_format).__name__,
+            pks=(
+                list(queryset.values_list("pk", flat=True))
+                if filtered else None
+            ),
+            export_fields=self.get_export_resource_fields_from_form(
+                export_form),
+        )
+        return self.job_started(request, job, "Экспорт")
+
+    def job_started(self, request, job, title):
+        messages.info(
+            request,
+            format_html(
+                '{} поставлен в очередь: <a href="{}">задача №{}</a>.',
+                title,
+                reverse("admin:jobs_job_change", args=[job.pk]),
+                job.pk,
+            ),
+        )
+        opts = self.model._meta
+        return redirect(
+            f"admin:{opts.app_label}_{opts.model_name}_changelist")
 
 
 class RecipeAdminForm(forms.ModelForm):
@@ -43,27 +117,25 @@ class IngredientInRecipeInline(admin.TabularInline):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(BackgroundImportExportAdmin):
+    resource_class = RecipeResource
     form = RecipeAdminForm
     list_display = ("name", "author", "favorites_count")
+    readonly_fields = ("favorites_count",)
     search_fields = ("name", "author__username", "author__email")
     filter_horizontal = ("tags",)
     inlines = [IngredientInRecipeInline]
 
-    @admin.display(description="В избранном")
-    def favorites_count(self, obj):
-        return obj.favorites.count()
-
 
 @admin.register(Tag)
-class TagAdmin(ImportExportModelAdmin):
+class TagAdmin(BackgroundImportExportAdmin):
     resource_class = TagResource
     list_display = ("name", "slug")
     search_fields = ("name", "slug")
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(ImportExportModelAdmin):
+class IngredientAdmin(BackgroundImportExportAdmin):
     resource_class = IngredientResource
     list_display = ("name", "measurement_unit")
     search_fields = ("name",)
@@ -86,3 +158,10 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
+
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    list_display = ("code", "recipe")
+    search_fields = ("code", "recipe__name")
+    autocomplete_fields = ["recipe"]
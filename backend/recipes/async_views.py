@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework.response import Response
+
+from core.async_views import AsyncReadView, Fallback, paginate
+
+from .ingredient_index import ingredient_index
+
+
+class CatalogAsyncView(AsyncReadView):
+    """Список и карточка тега или ингредиента."""
+
+    async def handle(self, view, **kwargs):
+        return await self.conditional(view, self.get_data, **kwargs)
+
+    async def get_data(self, view, pk=None):
+        if pk is not None:
+            instance = await view.get_queryset().filter(pk=pk).afirst()
+            if instance is None:
+                raise Http404
+            return Response(view.get_serializer(instance).data)
+        queryset = view.filter_queryset(view.get_queryset())
+        return Response(
+            view.get_serializer(
+                [obj async for obj in queryset], many=True).data
+        )
+
+
+class IngredientAsyncView(CatalogAsyncView):
+    async def get_data(self, view, pk=None):
+        name = view.request.query_params.get("name")
+        if pk is None and name is not None:
+            # Индекс в памяти может обратиться к БД при перестроении.
+            return Response(await sync_to_async(ingredient_index.search)(
+                name, view.catalog_version))
+        return await super().get_data(view, pk)
+
+
+class RecipeAsyncView(AsyncReadView):
+    """Список рецептов с постраничной пагинацией и карточка рецепта."""
+
+    async def handle(self, view, pk=None):
+        if pk is not None:
+            return await self.conditional(view, self.retrieve, pk=pk)
+        if "search" in view.request.query_params:
+            raise Fallback
+        # FilterSet проверяет слаги тегов запросом к БД.
+        queryset = await sync_to_async(view.filter_queryset)(
+            view.get_queryset())
+        page = await paginate(view, view.get_rows(queryset))
+        if page is None:
+            raise Fallback
+        return view.get_paginated_response(
+            await sync_to_async(view.render_rows)(page))
+
+    async def retrieve(self, view, pk):
+        instance = await view.get_queryset().filter(pk=pk).afirst()
+        if instance is None:
+            raise Http404
+        view.check_object_permissions(view.request, instance)
+        return Response(await self.serialize(view, instance))
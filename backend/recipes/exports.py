@@ -0,0 +1,112 @@
+"""
+Потоковая выгрузка списка покупок.
+
+Каждый формат — генератор фрагментов ответа, который читает строки
+из курсора по мере отправки, поэтому расход памяти не зависит
+от размера корзины.
+
+PDF так не стримится: документ собирается целиком. Поэтому он
+строится фоновой задачей recipes.export_shopping_list (см. jobs)
+в обработчиках run_worker — их число и ограничивает нагрузку,
+а процессы gunicorn заняты только постановкой задачи.
+"""
+import csv
+import json
+import uuid
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from .models import ShoppingListItem
+
+EXPORT_CHUNK_SIZE = 500
+PDF_FORMAT = "pdf"
+PDF_FONT = Path(__file__).resolve().parent / "fonts" / "DejaVuSans.ttf"
+PDF_DIR = "exports/shopping-lists/"
+
+
+def get_rows(user):
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values_list(
+            "ingredient__name", "ingredient__measurement_unit", F("amount")
+        )
+        .order_by("ingredient__name")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def export_txt(rows):
+    separator = ""
+    for name, measurement_unit, amount in rows:
+        yield f"{separator}{name} ({measurement_unit}) — {amount}"
+        separator = "\n"
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(["name", "measurement_unit", "amount"])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_json(rows):
+    yield "["
+    separator = ""
+    for name, measurement_unit, amount in rows:
+        item = json.dumps(
+            {
+                "name": name,
+                "measurement_unit": measurement_unit,
+                "amount": amount,
+            },
+            ensure_ascii=False,
+        )
+        yield f"{separator}{item}"
+        separator = ","
+    yield "]"
+
+
+EXPORT_FORMATS = {
+    "txt": ("text/plain; charset=utf-8", export_txt),
+    "csv": ("text/csv; charset=utf-8", export_csv),
+    "json": ("application/json", export_json),
+}
+
+
+def render_pdf(rows):
+    """PDF со списком покупок; шрифт DejaVu Sans — для кириллицы."""
+    pdf = FPDF()
+    pdf.add_font("DejaVu", fname=str(PDF_FONT))
+    pdf.add_page()
+    pdf.set_font("DejaVu", size=16)
+    pdf.cell(text="Список покупок", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(4)
+    pdf.set_font("DejaVu", size=12)
+    for name, measurement_unit, amount in rows:
+        pdf.multi_cell(
+            0, 7, f"{name} ({measurement_unit}) — {amount}",
+            new_x=XPos.LMARGIN, new_y=YPos.NEXT,
+        )
+    return bytes(pdf.output())
+
+
+def save_pdf(user_id):
+    """
+    Сохраняет PDF со списком покупок пользователя. Имя файла случайное:
+    медиафайлы отдаются без проверки прав.
+    """
+    name = default_storage.save(
+        f"{PDF_DIR}{uuid.uuid4().hex}.pdf",
+        ContentFile(render_pdf(get_rows(user_id))),
+    )
+    return {"file": name, "url": default_storage.url(name)}
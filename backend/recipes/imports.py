@@ -0,0 +1,131 @@
+"""
+Фоновый импорт и экспорт данных через django-import-export.
+
+Файл импорта сохраняется в хранилище, а обработчик очереди задач
+импортирует его пачками по CHUNK_SIZE строк, каждая в своей
+транзакции, и обновляет прогресс задачи. Экспорт читает записи
+через iterator() и сразу пишет строки в файл.
+"""
+import csv
+import io
+import tempfile
+import uuid
+from collections import Counter
+
+import tablib
+from django.core.files import File
+from django.core.files.storage import default_storage
+from import_export.formats import base_formats
+
+from jobs.queue import set_progress
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 50
+IMPORTS_DIR = "imports/"
+EXPORTS_DIR = "exports/"
+DELIMITERS = {base_formats.CSV: ",", base_formats.TSV: "\t"}
+
+
+def save_upload(upload):
+    """Сохраняет загруженный файл импорта и возвращает его имя."""
+    name = f"{IMPORTS_DIR}{uuid.uuid4().hex}-{upload.name}"
+    return default_storage.save(name, upload)
+
+
+def get_errors(result, offset):
+    """Ошибки пачки с номерами строк исходного файла."""
+    errors = []
+    for number, row_errors in result.row_errors():
+        errors.extend(
+            f"Строка {offset + (error.number or number)}: {error.error}"
+            for error in row_errors
+        )
+    for row in result.invalid_rows:
+        errors.extend(
+            f"Строка {offset + row.number}: {field}: {message}"
+            for field, messages in row.error_dict.items()
+            for message in messages
+        )
+    return errors
+
+
+def import_file(job, resource_class, path, input_format, encoding):
+    with default_storage.open(path, "rb") as file:
+        data = file.read()
+    if not input_format.is_binary():
+        input_format.encoding = encoding
+    dataset = input_format.create_dataset(data)
+    del data
+
+    total = len(dataset)
+    totals = Counter()
+    errors = []
+    for start in range(0, total, CHUNK_SIZE):
+        chunk = tablib.Dataset(
+            *dataset[start:start + CHUNK_SIZE], headers=dataset.headers
+        )
+        result = resource_class().import_data(
+            chunk, dry_run=False, raise_errors=False, use_transactions=True
+        )
+        if result.has_errors():
+            # Пачка с ошибками откатывается целиком.
+            totals["error"] += len(chunk)
+            errors.append(
+                f"Строки {start + 1}–{start + len(chunk)} не импортированы."
+            )
+        else:
+            totals.update(result.totals)
+        errors.extend(get_errors(result, start))
+        set_progress(job, (start + len(chunk)) * 99 // total)
+
+    default_storage.delete(path)
+    return {
+        "rows": total,
+        "totals": {key: value for key, value in totals.items() if value},
+        "errors": errors[:MAX_ERRORS],
+    }
+
+
+def write_delimited(file, headers, rows, delimiter):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text, delimiter=delimiter)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+    text.flush()
+    text.detach()
+
+
+def export_file(job, resource_class, file_format, pks=None,
+                export_fields=None):
+    resource = resource_class()
+    queryset = resource.get_queryset()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    total = queryset.count() or 1
+    exported = Counter()
+
+    def rows():
+        for obj in resource.iter_queryset(queryset):
+            exported["rows"] += 1
+            if exported["rows"] % CHUNK_SIZE == 0:
+                set_progress(job, exported["rows"] * 99 // total)
+            yield resource.export_resource(obj, selected_fields=export_fields)
+
+    headers = resource.get_export_headers(selected_fields=export_fields)
+    with tempfile.TemporaryFile() as file:
+        delimiter = DELIMITERS.get(type(file_format))
+        if delimiter:
+            write_delimited(file, headers, rows(), delimiter)
+        else:
+            data = file_format.export_data(
+                tablib.Dataset(*rows(), headers=headers)
+            )
+            file.write(data.encode() if isinstance(data, str) else data)
+        file.seek(0)
+        name = default_storage.save(
+            f"{EXPORTS_DIR}{queryset.model._meta.model_name}-{job.pk}."
+            f"{file_format.get_extension()}",
+            File(file),
+        )
+    return {"file": name, "rows": exported["rows"]}
@@ -0,0 +1,78 @@
+"""
+Индекс ингредиентов в памяти процесса для автодополнения.
+
+Справочник небольшой (около 2 200 строк), поэтому он целиком хранится
+в отсортированном по названию списке. Совпадения по началу названия
+ищутся бинарным поиском и идут первыми, за ними — совпадения
+по подстроке.
+
+Индекс помнит версию справочника (CatalogVersion, versions.INGREDIENTS),
+из которой построен, и перестраивается, как только общая версия в БД
+изменилась — в том числе после правок в других процессах. Представление
+передаёт версию, уже прочитанную для ETag, поэтому проверка не стоит
+отдельного запроса.
+"""
+import threading
+from bisect import bisect_left
+
+from . import versions
+from .models import Ingredient
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def invalidate(self):
+        self._index = None
+
+    def _is_stale(self, version):
+        return self._index is None or self._version != version
+
+    def _get(self, version):
+        if self._is_stale(version):
+            with self._lock:
+                if self._is_stale(version):
+                    # Версия прочитана до строк, поэтому индекс не старее
+                    # её; гонка с записью приведёт к лишнему перестроению.
+                    rows = sorted(
+                        Ingredient.objects.values(
+                            "id", "name", "measurement_unit"),
+                        key=lambda row: (row["name"].casefold(), row["id"]),
+                    )
+                    self._index = (
+                        [row["name"].casefold() for row in rows],
+                        rows,
+                    )
+                    self._version = version
+        return self._index
+
+    def search(self, query, version=None):
+        """
+        Ингредиенты, в названии которых есть query, в порядке ранга.
+
+        version — текущая версия справочника; без неё читается из БД.
+        """
+        if version is None:
+            version, _ = versions.get_versions(
+                versions.INGREDIENTS)[versions.INGREDIENTS]
+        keys, rows = self._get(version)
+        query = query.casefold()
+        if not query:
+            return list(rows)
+
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+
+        return rows[start:end] + [
+            row
+            for position, (key, row) in enumerate(zip(keys, rows))
+            if query in key and not start <= position < end
+        ]
+
+
+ingredient_index = IngredientIndex()
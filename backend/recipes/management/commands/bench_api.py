@@ -0,0 +1,505 @@
+import base64
+import io
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.urls import URLResolver
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import urls as api_urls
+
+from jobs.models import Job
+from recipes import short_links
+from recipes.ingredient_index import ingredient_index
+from recipes.management.commands.seed_synthetic import DOMAIN, PASSWORD
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription
+
+User = get_user_model()
+
+SCALES = {
+    "small": {"users": 20, "recipes": 200, "favorites": 10},
+    "medium": {"users": 200, "recipes": 3000, "favorites": 20},
+    "large": {"users": 1000, "recipes": 30000, "favorites": 50},
+}
+BASELINE = Path(settings.BASE_DIR) / "bench_baseline.json"
+# Запас к p50 из базовой линии, чтобы шум не давал ложных срабатываний.
+MIN_SLACK_MS = 5
+BENCH_RECIPE = "Рецепт для замеров"
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (90, 160, 60)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+IMAGE = make_image()
+IMAGE_BASE64 = "data:image/png;base64," + base64.b64encode(IMAGE).decode()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Scenario:
+    """
+    Запрос к одному маршруту api/urls.py. path форматируется значениями
+    из контекста; setup и cleanup выполняются вне замера.
+    """
+
+    def __init__(self, route, method, path, data=None, client="user",
+                 setup=None, cleanup=None, variant=""):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.data = data
+        self.client = client
+        self.setup = setup
+        self.cleanup = cleanup
+        self.key = " ".join(filter(None, (method, route, variant)))
+
+    def get_data(self, context, number):
+        if callable(self.data):
+            return self.data(context, number)
+        return self.data
+
+
+def recipe_data(context, number):
+    return {
+        "name": BENCH_RECIPE,
+        "text": f"Описание {number}",
+        "image": IMAGE_BASE64,
+        "cooking_time": 10 + number % 5,
+        "tags": [context["tag"]],
+        "ingredients": [
+            {"id": ingredient_id, "amount": 10 + number % 5}
+            for ingredient_id in context["ingredients"]
+        ],
+    }
+
+
+def create_recipe(context):
+    recipe = Recipe.objects.create(
+        author_id=context["user"],
+        name=BENCH_RECIPE,
+        text="Описание",
+        cooking_time=10,
+        image=Recipe.objects.get(pk=context["own_recipe"]).image.name,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(recipe=recipe, ingredient_id=pk, amount=10)
+        for pk in context["ingredients"]
+    )
+    recipe.tags.set([context["tag"]])
+    context["temp_recipe"] = recipe.pk
+
+
+def delete_bench_recipes(context):
+    Recipe.objects.filter(name=BENCH_RECIPE).delete()
+
+
+def set_avatar(context):
+    User.objects.get(pk=context["user"]).avatar.save(
+        "bench.png", ContentFile(IMAGE), save=True)
+
+
+def delete_avatar(context):
+    User.objects.get(pk=context["user"]).avatar.delete(save=True)
+
+
+def reset_password(context):
+    user = User.objects.get(pk=context["user"])
+    user.set_password(PASSWORD)
+    user.save(update_fields=["password"])
+
+
+def relation(model, field, target):
+    def create(context):
+        model.objects.get_or_create(
+            user_id=context["user"], **{field: context[target]})
+
+    def delete(context):
+        for obj in model.objects.filter(
+                user_id=context["user"], **{field: context[target]}):
+            obj.delete()
+
+    return create, delete
+
+
+subscribe, unsubscribe = relation(Subscription, "author_id", "author")
+favorite, unfavorite = relation(Favorite, "recipe_id", "recipe")
+add_to_cart, remove_from_cart = relation(ShoppingCart, "recipe_id", "recipe")
+
+SCENARIOS = [
+    Scenario("api-root", "GET", "/api/"),
+    Scenario("user-list", "GET", "/api/users/?limit=10", client="anon"),
+    Scenario(
+        "user-list", "POST", "/api/users/", client="anon",
+        data={
+            "email": f"new@{DOMAIN}",
+            "username": "synthetic-new",
+            "first_name": "Новый",
+            "last_name": "Пользователь",
+            "password": PASSWORD,
+        },
+        cleanup=lambda context: User.objects.filter(
+            email=f"new@{DOMAIN}").delete(),
+    ),
+    Scenario("user-detail", "GET", "/api/users/{author}/"),
+    Scenario("user-me", "GET", "/api/users/me/"),
+    Scenario("user-avatar", "PUT", "/api/users/me/avatar/",
+             data={"avatar": IMAGE_BASE64}, cleanup=delete_avatar),
+    Scenario("user-avatar", "DELETE", "/api/users/me/avatar/",
+             setup=set_avatar),
+    Scenario(
+        "user-set-password", "POST", "/api/users/set_password/",
+        data={"current_password": PASSWORD, "new_password": "Bench-pass-2"},
+        cleanup=reset_password,
+    ),
+    Scenario("subscribe", "POST", "/api/users/{author}/subscribe/",
+             cleanup=unsubscribe),
+    Scenario("subscribe", "DELETE", "/api/users/{author}/subscribe/",
+             setup=subscribe),
+    Scenario("subscriptions", "GET",
+             "/api/users/subscriptions/?recipes_limit=3"),
+    Scenario("favorite", "POST", "/api/recipes/{recipe}/favorite/",
+             cleanup=unfavorite),
+    Scenario("favorite", "DELETE", "/api/recipes/{recipe}/favorite/",
+             setup=favorite),
+    Scenario("shopping_cart", "POST", "/api/recipes/{recipe}/shopping_cart/",
+             cleanup=remove_from_cart),
+    Scenario("shopping_cart", "DELETE",
+             "/api/recipes/{recipe}/shopping_cart/", setup=add_to_cart),
+    Scenario("download_shopping_cart", "GET",
+             "/api/recipes/download_shopping_cart/"),
+    Scenario("job_status", "GET", "/api/jobs/{job}/"),
+    Scenario("metrics", "GET", "/api/_metrics", client="staff"),
+    Scenario("tags-list", "GET", "/api/tags/", client="anon"),
+    Scenario("tags-detail", "GET", "/api/tags/{tag}/", client="anon"),
+    Scenario("ingredients-list", "GET", "/api/ingredients/?name=сах",
+             client="anon"),
+    Scenario("ingredients-detail", "GET", "/api/ingredients/{ingredient}/",
+             client="anon"),
+    Scenario("recipes-list", "GET", "/api/recipes/", client="anon",
+             variant="anon"),
+    Scenario("recipes-list", "GET", "/api/recipes/?page=2&limit=6"),
+    Scenario("recipes-list", "GET", "/api/recipes/?cursor=&limit=6",
+             variant="cursor"),
+    Scenario("recipes-list", "GET", "/api/recipes/?is_favorited=1",
+             variant="favorited"),
+    Scenario("recipes-list", "GET", "/api/recipes/?tags={tag_slug}",
+             variant="tags"),
+    Scenario("recipes-list", "POST", "/api/recipes/", data=recipe_data,
+             cleanup=delete_bench_recipes),
+    Scenario("recipes-feed", "GET", "/api/recipes/feed/"),
+    Scenario("recipes-detail", "GET", "/api/recipes/{recipe}/"),
+    Scenario("recipes-detail", "PATCH", "/api/recipes/{temp_recipe}/",
+             data=recipe_data, setup=create_recipe,
+             cleanup=delete_bench_recipes),
+    Scenario("recipes-detail", "DELETE", "/api/recipes/{temp_recipe}/",
+             setup=create_recipe),
+    Scenario("recipes-short-link", "GET", "/api/recipes/{recipe}/get-link/"),
+]
+
+
+def get_route_names(patterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= get_route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def get_context():
+    """Пользователь для замеров и объекты, к которым идут запросы."""
+    user = User.objects.get(email=f"user0@{DOMAIN}")
+    staff = User.objects.create_user(
+        email=f"staff@{DOMAIN}", username="synthetic-staff",
+        first_name="Сотрудник", last_name="Сотрудник",
+        password=PASSWORD, is_staff=True,
+    )
+    followed = Subscription.objects.filter(user=user).values("author_id")
+    recipe = (
+        Recipe.objects.exclude(author=user)
+        .exclude(favorites__user=user)
+        .exclude(shopping_carts__user=user)
+        .order_by("pk").first()
+    )
+    tag = Tag.objects.order_by("pk").first()
+    return {
+        "user": user.pk,
+        "staff": staff.pk,
+        "author": User.objects.exclude(pk=user.pk).exclude(
+            pk__in=followed).exclude(pk=staff.pk).order_by("pk").first().pk,
+        "recipe": recipe.pk,
+        "own_recipe": user.recipes.order_by("pk").first().pk,
+        "tag": tag.pk,
+        "tag_slug": tag.slug,
+        "ingredient": Ingredient.objects.order_by("pk").first().pk,
+        "ingredients": list(
+            Ingredient.objects.order_by("pk").values_list(
+                "pk", flat=True)[:3]),
+        "job": Job.objects.create(name="bench", user=user).pk,
+    }
+
+
+def get_clients(context):
+    clients = {"anon": APIClient()}
+    for name in ("user", "staff"):
+        token, _ = Token.objects.get_or_create(user_id=context[name])
+        clients[name] = APIClient()
+        clients[name].credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return clients
+
+
+def percentile(latencies, number):
+    return statistics.quantiles(
+        latencies, n=100, method="inclusive")[number - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержки и число SQL-запросов для всех маршрутов "
+        "api/urls.py на синтетических данных разного объёма в тестовой "
+        "базе. Сравнивает результат с базовой линией (bench_baseline.json "
+        "в репозитории) и завершается ошибкой, если маршрут превысил "
+        "бюджет SQL-запросов, число запросов растёт с объёмом данных или "
+        "базовой линии нет. Бюджеты задержек необязательны: они "
+        "записываются с --save --latency и проверяются только на той же СУБД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", action="append", dest="scales", choices=SCALES,
+            help="Объём данных; по умолчанию small и medium.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--baseline", type=Path, default=BASELINE)
+        parser.add_argument(
+            "--save", action="store_true",
+            help="Записать результат как новую базовую линию.",
+        )
+        parser.add_argument(
+            "--latency", action="store_true",
+            help="С --save записать и медианы задержек. Они зависят от "
+                 "железа, поэтому в репозиторий не коммитятся.",
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="Допустимый рост медианы относительно базовой линии.",
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 2:
+            raise CommandError("Нужно хотя бы два повтора.")
+        missing = get_route_names(api_urls.urlpatterns) - {
+            scenario.route for scenario in SCENARIOS}
+        if missing:
+            raise CommandError(
+                "Нет сценариев для маршрутов: {}.".format(
+                    ", ".join(sorted(missing))))
+        baseline = None
+        if not options["save"]:
+            if not options["baseline"].is_file():
+                raise CommandError(
+                    f"Нет базовой линии {options['baseline']}; "
+                    f"запишите её с --save.")
+            baseline = json.loads(options["baseline"].read_text())
+
+        scales = options["scales"] or ["small", "medium"]
+        scales.sort(key=list(SCALES).index)
+        results = self.run_scales(scales, options)
+
+        failures = self.check_scaling(results)
+        if baseline is not None:
+            failures += self.check_baseline(results, baseline, options)
+        failures += [
+            f"{scale} {key}: ошибок {result['errors']}"
+            for scale, routes in results.items()
+            for key, result in routes.items()
+            if result["errors"]
+        ]
+        if failures:
+            raise CommandError(
+                "Превышены бюджеты:\n" + "\n".join(failures))
+        if options["save"]:
+            options["baseline"].write_text(json.dumps(
+                self.make_baseline(results, options),
+                ensure_ascii=False, indent=2,
+            ) + "\n")
+            self.stdout.write(f"Базовая линия: {options['baseline']}")
+
+    def make_baseline(self, results, options):
+        """
+        Бюджет SQL-запросов маршрута — максимум по всем объёмам: он не
+        зависит ни от железа, ни от СУБД. Медианы задержек — только с
+        --latency и с пометкой СУБД, на которой они сняты.
+        """
+        baseline = {"queries": {}}
+        for routes in results.values():
+            for key, result in routes.items():
+                baseline["queries"][key] = max(
+                    baseline["queries"].get(key, 0), result["queries"])
+        if options["latency"]:
+            baseline["latency"] = {
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+                "p50_ms": {
+                    scale: {
+                        key: result["p50_ms"]
+                        for key, result in routes.items()
+                    }
+                    for scale, routes in results.items()
+                },
+            }
+        return baseline
+
+    def run_scales(self, scales, options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment()
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root):
+                return {
+                    scale: self.run_scale(scale, options["repeat"])
+                    for scale in scales
+                }
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+    def run_scale(self, scale, repeat):
+        call_command("flush", interactive=False, verbosity=0)
+        cache.clear()
+        short_links.cache.clear()
+        ingredient_index.invalidate()
+        call_command("seed_synthetic", stdout=io.StringIO(), **SCALES[scale])
+        context = get_context()
+        clients = get_clients(context)
+
+        self.stdout.write(
+            f"\n{scale}: {SCALES[scale]}\n"
+            f"{'маршрут':<42} {'p50':>7} {'p95':>7} {'p99':>7} {'SQL':>4}"
+        )
+        results = {}
+        for scenario in SCENARIOS:
+            result = self.run_scenario(
+                scenario, context, clients[scenario.client], repeat)
+            results[scenario.key] = result
+            self.stdout.write(
+                f"{scenario.key:<42} {result['p50_ms']:>7.1f} "
+                f"{result['p95_ms']:>7.1f} {result['p99_ms']:>7.1f} "
+                f"{result['queries']:>4}"
+            )
+        return results
+
+    def run_scenario(self, scenario, context, client, repeat):
+        latencies, queries, errors = [], 0, 0
+        # Первый запрос прогревает кеши и не учитывается.
+        for number in range(repeat + 1):
+            if scenario.setup:
+                scenario.setup(context)
+            counter = QueryCounter()
+            path = scenario.path.format(**context)
+            data = scenario.get_data(context, number)
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = client.generic(
+                    scenario.method, path,
+                    json.dumps(data) if data is not None else "",
+                    content_type="application/json",
+                )
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if scenario.cleanup:
+                scenario.cleanup(context)
+            if number:
+                latencies.append(elapsed * 1000)
+                queries = max(queries, counter.count)
+                errors += response.status_code >= 400
+        return {
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries": queries,
+            "errors": errors,
+        }
+
+    def check_scaling(self, results):
+        """Число запросов маршрута не должно зависеть от объёма данных."""
+        scales = list(results)
+        failures = []
+        for key, result in results[scales[0]].items():
+            for scale in scales[1:]:
+                queries = results[scale][key]["queries"]
+                if queries > result["queries"]:
+                    failures.append(
+                        f"{scale} {key}: SQL-запросов {queries}, "
+                        f"на {scales[0]} — {result['queries']}"
+                    )
+        return failures
+
+    def check_baseline(self, results, baseline, options):
+        budgets = baseline.get("queries", {})
+        failures = [
+            f"{scenario.key}: нет бюджета SQL-запросов в базовой линии"
+            for scenario in SCENARIOS
+            if scenario.key not in budgets
+        ]
+        for scale, routes in results.items():
+            for key, result in routes.items():
+                if result["queries"] > budgets.get(key, result["queries"]):
+                    failures.append(
+                        f"{scale} {key}: SQL-запросов {result['queries']}, "
+                        f"бюджет {budgets[key]}"
+                    )
+        latency = baseline.get("latency")
+        if latency is None:
+            return failures
+        if latency["database"] != connection.vendor:
+            self.stdout.write(
+                f"Задержки в базовой линии сняты на {latency['database']}, "
+                f"сравнение задержек пропущено.")
+            return failures
+        for scale, routes in results.items():
+            base_routes = latency["p50_ms"].get(scale, {})
+            for key, result in routes.items():
+                base = base_routes.get(key)
+                if base is None:
+                    continue
+                budget = max(
+                    base * (1 + options["tolerance"]), base + MIN_SLACK_MS)
+                if result["p50_ms"] > budget:
+                    failures.append(
+                        f"{scale} {key}: p50 {result['p50_ms']:.1f} мс, "
+                        f"бюджет {budget:.1f} мс"
+                    )
+        return failures
@@ -0,0 +1,88 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+PATHS = (
+    "/api/recipes/",
+    "/api/recipes/?page=2&limit=6",
+    "/api/tags/",
+    "/api/ingredients/?name=%D1%81%D0%B0",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность и задержки GET-ручек API "
+        "двух запущенных серверов, например gunicorn с SERVER_MODE=wsgi "
+        "и SERVER_MODE=asgi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls", nargs="+",
+            help="Базовые адреса серверов, например http://127.0.0.1:8000",
+        )
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--path", action="append", dest="paths")
+        parser.add_argument(
+            "--token", help="Токен для запросов с авторизацией."
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def fetch(self, url, headers, timeout):
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers),
+                         timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except OSError:
+            status = None
+        return status, time.perf_counter() - started
+
+    def run(self, base_url, paths, options):
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+        urls = [
+            base_url.rstrip("/") + paths[number % len(paths)]
+            for number in range(options["requests"])
+        ]
+        # Прогрев: соединения с базой и кеши процессов.
+        for url in urls[:len(paths)]:
+            self.fetch(url, headers, options["timeout"])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(
+                lambda url: self.fetch(url, headers, options["timeout"]),
+                urls,
+            ))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        percentiles = statistics.quantiles(latencies, n=100)
+        errors = sum(1 for status, _ in results if status != 200)
+        return (
+            f"{base_url}: {len(results) / elapsed:.1f} запросов/с, "
+            f"p50 {percentiles[49] * 1000:.1f} мс, "
+            f"p99 {percentiles[98] * 1000:.1f} мс, ошибок: {errors}"
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно хотя бы два запроса.")
+        paths = options["paths"] or PATHS
+        self.stdout.write(
+            f"Запросов: {options['requests']}, "
+            f"параллельно: {options['concurrency']}"
+        )
+        for base_url in options["urls"]:
+            self.stdout.write(self.run(base_url, paths, options))
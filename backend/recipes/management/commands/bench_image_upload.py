@@ -0,0 +1,71 @@
+import base64
+import json
+import os
+import tracemalloc
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.fields import Base64ImageField
+
+
+class Command(BaseCommand):
+    help = (
+        "Пиковое потребление памяти при загрузке изображения "
+        "base64 в JSON и файлом в multipart/form-data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=2000,
+            help="Сторона тестового изображения в пикселях.")
+
+    def make_image(self, side):
+        # Шум плохо сжимается, так что файл получается крупным.
+        image = Image.frombytes(
+            "RGB", (side, side), os.urandom(side * side * 3))
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=95)
+        return buffer.getvalue()
+
+    def measure(self, django_request, parser):
+        tracemalloc.start()
+        request = Request(django_request, parsers=[parser])
+        value = request.data["image"]
+        Base64ImageField().to_internal_value(value)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    def handle(self, *args, **options):
+        content = self.make_image(options["size"])
+        factory = APIRequestFactory()
+
+        encoded = "data:image/jpeg;base64," + base64.b64encode(
+            content).decode()
+        json_request = factory.post(
+            "/", json.dumps({"image": encoded}),
+            content_type="application/json")
+
+        upload = BytesIO(content)
+        upload.name = "image.jpg"
+        multipart_request = factory.post(
+            "/", {"image": upload}, format="multipart")
+
+        json_size = int(json_request.META["CONTENT_LENGTH"])
+        multipart_size = int(multipart_request.META["CONTENT_LENGTH"])
+        json_peak = self.measure(json_request, JSONParser())
+        multipart_peak = self.measure(multipart_request, MultiPartParser())
+
+        mb = 1024 * 1024
+        self.stdout.write(
+            f"Изображение: {len(content) / mb:.2f} МБ, "
+            f"тело JSON: {json_size / mb:.2f} МБ, "
+            f"multipart: {multipart_size / mb:.2f} МБ\n"
+            f"base64 в JSON: пик {json_peak / mb:.2f} МБ\n"
+            f"multipart/form-data: пик {multipart_peak / mb:.2f} МБ"
+        )
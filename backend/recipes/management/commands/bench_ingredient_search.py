@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import versions
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+from recipes.serializers import IngredientSerializer
+
+DEFAULT_QUERIES = ["а", "мо", "сах", "молок", "соль", "перец", "сыр", "ябл"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск ингредиентов через icontains в БД "
+        "и через индекс в памяти."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def measure(self, search, queries, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for query in queries:
+                search(query)
+        return (time.perf_counter() - started) * 1000 / (
+            repeat * len(queries))
+
+    def handle(self, *args, **options):
+        queries, repeat = options["queries"], options["repeat"]
+
+        def search_orm(query):
+            return IngredientSerializer(
+                Ingredient.objects.filter(name__icontains=query), many=True
+            ).data
+
+        # Как в представлении: версия справочника известна из ETag.
+        version, _ = versions.get_versions(
+            versions.INGREDIENTS)[versions.INGREDIENTS]
+
+        def search_index(query):
+            return ingredient_index.search(query, version)
+
+        ingredient_index.invalidate()
+        started = time.perf_counter()
+        search_index("")
+        build_ms = (time.perf_counter() - started) * 1000
+
+        orm_ms = self.measure(search_orm, queries, repeat)
+        index_ms = self.measure(search_index, queries, repeat)
+
+        self.stdout.write(
+            f"Ингредиентов: {Ingredient.objects.count()}, "
+            f"запросов: {len(queries)} x {repeat}\n"
+            f"Построение индекса: {build_ms:.2f} мс\n"
+            f"ORM (icontains): {orm_ms:.3f} мс/запрос\n"
+            f"Индекс в памяти: {index_ms:.3f} мс/запрос"
+        )
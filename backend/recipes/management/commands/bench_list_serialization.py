@@ -0,0 +1,113 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from recipes.models import Recipe
+from recipes.serializers import RecipeReadSerializer
+from recipes.views import RecipeViewSet
+
+User = get_user_model()
+
+NO_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стоимость сериализации страницы рецептов: "
+        "RecipeReadSerializer (без кеша и с кешем) и RecipeRowsSerializer "
+        "из строк values(). Проверяет, что JSON совпадает байт в байт. "
+        "Данные берутся из текущей базы, например после seed_synthetic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--user", help="Email пользователя; по умолчанию — аноним."
+        )
+        parser.add_argument(
+            "--srcset", action="store_true",
+            help="Сериализовать с полем image_srcset.",
+        )
+
+    def make_view(self, user, options):
+        params = {"limit": options["limit"]}
+        if options["srcset"]:
+            params["srcset"] = 1
+        request = Request(RequestFactory().get("/api/recipes/", params))
+        if user is not None:
+            request.user = user
+        return RecipeViewSet(
+            request=request, action="list", format_kwarg=None, kwargs={})
+
+    def render_models(self, view, limit):
+        recipes = list(view.get_queryset()[:limit])
+        return JSONRenderer().render(RecipeReadSerializer(
+            recipes, many=True, context=view.get_serializer_context()
+        ).data)
+
+    def render_rows(self, view, limit):
+        rows = list(view.get_rows(view.get_queryset())[:limit])
+        return JSONRenderer().render(view.render_rows(rows))
+
+    def measure(self, render, user, options):
+        """
+        (JSON, число SQL-запросов, медиана в мс). Каждый прогон — новый
+        запрос, как в API: кеши на объекте запроса не переиспользуются.
+        """
+        limit = options["limit"]
+        content = render(self.make_view(user, options), limit)
+        with CaptureQueriesContext(connection) as queries:
+            render(self.make_view(user, options), limit)
+        timings = []
+        for _ in range(options["repeat"]):
+            view = self.make_view(user, options)
+            started = time.perf_counter()
+            render(view, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        return content, len(queries), statistics.median(timings)
+
+    def handle(self, *args, **options):
+        if options["limit"] < 1 or options["repeat"] < 1:
+            raise CommandError("--limit и --repeat должны быть больше 0.")
+        user = None
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+            if user is None:
+                raise CommandError(
+                    f"Пользователь {options['user']} не найден.")
+
+        count = Recipe.objects.all()[:options["limit"]].count()
+        if not count:
+            raise CommandError("Нет рецептов, запустите seed_synthetic.")
+
+        with override_settings(CACHES=NO_CACHE):
+            results = {
+                "RecipeReadSerializer без кеша": self.measure(
+                    self.render_models, user, options),
+            }
+        results["RecipeReadSerializer с кешем"] = self.measure(
+            self.render_models, user, options)
+        results["RecipeRowsSerializer"] = self.measure(
+            self.render_rows, user, options)
+
+        contents = {content for content, _, _ in results.values()}
+        if len(contents) != 1:
+            raise CommandError("JSON сериализаторов различается.")
+        self.stdout.write(f"Рецептов на странице: {count}, "
+                          f"прогонов: {options['repeat']}")
+        for name, (_, queries, median) in results.items():
+            self.stdout.write(
+                f"{name}: {median:.2f} мс на страницу, "
+                f"{median * 1000 / count:.0f} мкс на рецепт, "
+                f"SQL-запросов: {queries}"
+            )
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from recipes import short_links
+from recipes.models import Recipe
+
+
+def resolve_by_scan(code):
+    """Прежний способ: хешировать id каждого рецепта до совпадения."""
+    for recipe_id in Recipe.objects.values_list("pk", flat=True).iterator():
+        if short_links.make_code(recipe_id) == code:
+            return recipe_id
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет время перехода по коротким ссылкам /r/<code>/: "
+        "перебор рецептов, поиск по индексу и кеш в памяти."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--links", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def measure(self, func, codes, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for code in codes:
+                func(code)
+        return (time.perf_counter() - started) * 1000 / (
+            repeat * len(codes))
+
+    def handle(self, *args, **options):
+        recipes = list(Recipe.objects.order_by("?")[:options["links"]])
+        if not recipes:
+            raise CommandError("В базе нет рецептов.")
+        codes = [short_links.get_code(recipe) for recipe in recipes]
+        client = Client()
+
+        def redirect(code):
+            response = client.get(reverse("short-link", args=[code]))
+            assert response.status_code == 302, response.status_code
+
+        def redirect_cold(code):
+            short_links.cache.clear()
+            redirect(code)
+
+        scan_ms = self.measure(resolve_by_scan, codes[:5], 1)
+        cold_ms = self.measure(redirect_cold, codes, options["repeat"])
+        warm_ms = self.measure(redirect, codes, options["repeat"])
+
+        self.stdout.write(
+            f"Рецептов: {Recipe.objects.count()}, ссылок: {len(codes)}\n"
+            f"Перебор рецептов: {scan_ms:.3f} мс/код\n"
+            f"Редирект, поиск в БД: {cold_ms:.3f} мс/запрос\n"
+            f"Редирект, кеш LRU: {warm_ms:.3f} мс/запрос"
+        )
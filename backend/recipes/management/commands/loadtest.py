@@ -0,0 +1,433 @@
+import json
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+COLLECTION = (
+    Path(settings.BASE_DIR).parent
+    / "postman_collection" / "foodgram.postman_collection.json"
+)
+# Папка коллекции, которая удаляет созданные объекты.
+TEARDOWN_FOLDER = "delete_requests"
+PROFILES = ("flow", "reader")
+
+VARIABLE = re.compile(r"{{(\w+)}}")
+STATUS = re.compile(
+    r"pm\.response\.status[\s\S]*?\.to\.be\.eql\(\s*\"([^\"]+)\"\s*\)")
+SET = re.compile(r"pm\.collectionVariables\.set\(\s*[\"'](\w+)[\"']\s*,"
+                 r"\s*([^;\n]+?)\s*\)\s*;?\s*$", re.MULTILINE)
+GET = re.compile(r"const (\w+) = _\.get\(responseData, \"([\w.]+)\"\)")
+PATH = re.compile(r"\[(\d+)\]|\.?(\w+)")
+SLICE = re.compile(r"\.slice\((\d+),\s*(\d+)\)$")
+REASONS = {status.phrase: status.value for status in HTTPStatus}
+
+
+def get_path(data, path):
+    """Значение по пути вида 'results[0].id' или None."""
+    for index, key in PATH.findall(path):
+        try:
+            data = data[int(index)] if index else data[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+    return data
+
+
+def parse_extractor(expression, script):
+    """
+    Переводит выражение из pm.collectionVariables.set() в функцию,
+    которая достаёт значение из JSON-ответа. Поддерживаются формы
+    из коллекции: responseData[0].id, responseData[0].name.slice(0,1)
+    и переменная, полученная через _.get(responseData, "поле").
+    """
+    aliases = dict(GET.findall(script))
+    if expression in aliases:
+        path, bounds = aliases[expression], None
+    elif expression.startswith("responseData"):
+        path = expression[len("responseData"):]
+        bounds = SLICE.search(path)
+        if bounds:
+            path = path[:bounds.start()]
+            bounds = slice(int(bounds[1]), int(bounds[2]))
+    else:
+        return None
+
+    def extract(data):
+        value = get_path(data, path)
+        if value is not None and bounds is not None:
+            value = str(value)[bounds]
+        return value
+
+    return extract
+
+
+def get_auth(auth):
+    if not auth or auth["type"] != "apikey":
+        return {}
+    values = {item["key"]: item["value"] for item in auth["apikey"]}
+    return {values["key"]: values["value"]}
+
+
+class Step:
+    """Запрос коллекции с ожидаемым статусом и сохраняемыми переменными."""
+
+    def __init__(self, item, folders, auth):
+        request = item["request"]
+        self.name = item["name"]
+        self.folders = folders
+        self.method = request["method"]
+        self.url = request["url"]["raw"]
+        self.headers = {**get_auth(request.get("auth") or auth)}
+        for header in request.get("header", []):
+            if not header.get("disabled"):
+                self.headers[header["key"]] = header["value"]
+        body = request.get("body") or {}
+        self.body = body.get("raw") if body.get("mode") == "raw" else None
+        if self.body is not None:
+            self.headers.setdefault("Content-Type", "application/json")
+
+        script = "\n".join(
+            "\n".join(event["script"]["exec"])
+            for event in item.get("event", [])
+            if event["listen"] == "test"
+        )
+        status = STATUS.search(script)
+        self.expected = REASONS.get(status[1]) if status else None
+        self.extractors = {}
+        for name, expression in SET.findall(script):
+            extract = parse_extractor(expression.strip(), script)
+            if extract is not None:
+                self.extractors[name] = extract
+
+        path = "/" + "/".join(request["url"].get("path", []))
+        self.endpoint = f"{self.method} " + re.sub(
+            r"/(?:{{\w+}}|\d+)(?=/)", "/{id}", path)
+
+    @property
+    def is_valid(self):
+        return self.expected is not None and self.expected < 400
+
+    @property
+    def is_read(self):
+        return self.method == "GET" and self.is_valid
+
+
+def flatten(items, folders=(), auth=None):
+    for item in items:
+        item_auth = item.get("auth") or auth
+        if "item" in item:
+            yield from flatten(
+                item["item"], (*folders, item["name"]), item_auth)
+        else:
+            yield Step(item, folders, auth)
+
+
+def substitute(text, variables):
+    """Подставляет переменные; None, если какой-то нет."""
+    missing = []
+
+    def replace(match):
+        if match[1] not in variables:
+            missing.append(match[1])
+            return match[0]
+        return str(variables[match[1]])
+
+    text = VARIABLE.sub(replace, text)
+    return None if missing else text
+
+
+def make_identities(variables, suffix):
+    """
+    Уникальные email и username для каждого прохода, чтобы
+    пользователи не пересекались между виртуальными пользователями.
+    """
+    identities = {}
+    for name, value in variables.items():
+        lower = name.lower()
+        if name.startswith("tooLong") or not lower.endswith(
+                ("email", "username")):
+            continue
+        value = json.loads(value)
+        if lower.endswith("email"):
+            local, domain = value.split("@", 1)
+            value = f"{local}+{suffix}@{domain}"
+        else:
+            value = f"{value}-{suffix}"
+        identities[name] = json.dumps(value)
+    return identities
+
+
+class VirtualUser:
+    def __init__(self, number, profile, steps, variables, options, run_id):
+        self.number = number
+        self.profile = profile
+        self.steps = steps
+        self.base_variables = variables
+        self.options = options
+        self.run_id = run_id
+        self.session = requests.Session()
+        self.results = []
+        self.skipped = 0
+        self.iteration = 0
+
+    def new_variables(self):
+        self.iteration += 1
+        variables = dict(self.base_variables)
+        variables.update(make_identities(
+            variables, f"{self.run_id}-{self.number}-{self.iteration}"))
+        return variables
+
+    def send(self, step, variables, record=True):
+        url = substitute(step.url, variables)
+        headers = {
+            key: substitute(value, variables)
+            for key, value in step.headers.items()
+        }
+        body = (
+            substitute(step.body, variables)
+            if step.body is not None else None
+        )
+        if url is None or None in headers.values() or (
+                step.body is not None and body is None):
+            self.skipped += record
+            return
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                step.method, url, headers=headers,
+                data=body.encode() if body is not None else None,
+                timeout=self.options["timeout"],
+            )
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, None
+        elapsed = time.perf_counter() - started
+        if record:
+            ok = status is not None and (
+                status == step.expected if step.expected
+                else status < 500)
+            self.results.append((step.endpoint, elapsed, ok))
+        if response is not None and step.extractors:
+            try:
+                data = response.json()
+            except ValueError:
+                return
+            for name, extract in step.extractors.items():
+                value = extract(data)
+                if value is not None:
+                    variables[name] = value
+
+    def setup(self):
+        """Читателю нужны пользователи и рецепты: проход без удаления."""
+        if self.profile != "reader":
+            return
+        self.variables = self.new_variables()
+        for step in self.steps:
+            if step.folders[:1] != (TEARDOWN_FOLDER,):
+                self.send(step, self.variables, record=False)
+
+    def run(self, deadline):
+        iterations = self.options["iterations"]
+        while (time.monotonic() < deadline
+               and (not iterations or self.iteration < iterations)):
+            if self.profile == "reader":
+                self.iteration += 1
+                steps, variables = (
+                    [step for step in self.steps if step.is_read],
+                    self.variables,
+                )
+            else:
+                steps, variables = self.steps, self.new_variables()
+                if self.options["valid_only"]:
+                    steps = [step for step in steps if step.is_valid]
+            for step in steps:
+                if time.monotonic() >= deadline:
+                    return
+                self.send(step, variables)
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PROFILES:
+            raise CommandError(
+                f"Неизвестный профиль {name!r}, доступны: "
+                + ", ".join(PROFILES))
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def assign_profiles(users, mix):
+    """Распределяет виртуальных пользователей по профилям по весам."""
+    total = sum(mix.values())
+    profiles = []
+    for name, weight in mix.items():
+        profiles += [name] * round(users * weight / total)
+    profiles += [max(mix, key=mix.get)] * (users - len(profiles))
+    return profiles[:users]
+
+
+def percentile(latencies, number):
+    if len(latencies) < 2:
+        return latencies[0]
+    return statistics.quantiles(
+        latencies, n=100, method="inclusive")[number - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест: воспроизводит postman-коллекцию против "
+        "запущенного сервера несколькими виртуальными пользователями "
+        "и выводит пропускную способность, p50/p95/p99 и долю ошибок "
+        "по каждому эндпоинту. Профиль flow проходит всю коллекцию "
+        "(регистрация, изменения, удаление), reader после одного "
+        "подготовительного прохода повторяет успешные GET-запросы. "
+        "Созданные пользователи остаются в базе, их email содержат "
+        "«+<id запуска>»."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url")
+        parser.add_argument("--collection", type=Path, default=COLLECTION)
+        parser.add_argument(
+            "--users", type=int, default=10,
+            help="Число одновременных виртуальных пользователей.",
+        )
+        parser.add_argument(
+            "--mix", type=parse_mix, default={"flow": 1, "reader": 4},
+            help="Доли профилей, например flow=1,reader=4.",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=60,
+            help="Длительность замера в секундах.",
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=0,
+            help="Ограничить число проходов на пользователя.",
+        )
+        parser.add_argument(
+            "--valid-only", action="store_true",
+            help="Профилю flow пропускать запросы, ожидающие ошибку.",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument(
+            "--json", type=Path, help="Сохранить отчёт в JSON.")
+
+    def handle(self, *args, **options):
+        if not options["collection"].is_file():
+            raise CommandError(f"Файл не найден: {options['collection']}")
+        if options["users"] < 1:
+            raise CommandError("Нужен хотя бы один пользователь.")
+        collection = json.loads(options["collection"].read_text())
+        steps = list(flatten(collection["item"], auth=collection.get("auth")))
+        variables = {
+            variable["key"]: variable["value"]
+            for variable in collection.get("variable", [])
+        }
+        if options["base_url"]:
+            variables["baseUrl"] = options["base_url"].rstrip("/")
+
+        run_id = uuid.uuid4().hex[:6]
+        users = [
+            VirtualUser(number, profile, steps, variables, options, run_id)
+            for number, profile in enumerate(
+                assign_profiles(options["users"], options["mix"]))
+        ]
+        timing = {}
+
+        def start():
+            timing["started"] = time.monotonic()
+            timing["deadline"] = timing["started"] + options["duration"]
+
+        barrier = threading.Barrier(len(users), action=start)
+
+        def run(user):
+            # Если подготовка одного пользователя упала, остальные
+            # не должны ждать его у барьера вечно.
+            try:
+                user.setup()
+            except BaseException:
+                barrier.abort()
+                raise
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+            user.run(timing["deadline"])
+
+        self.stdout.write(
+            f"Сервер: {variables['baseUrl']}, пользователей: {len(users)} "
+            f"({', '.join(user.profile for user in users)})"
+        )
+        with ThreadPoolExecutor(len(users)) as executor:
+            for future in [executor.submit(run, user) for user in users]:
+                future.result()
+        elapsed = time.monotonic() - timing["started"]
+        self.report(users, elapsed, options["json"])
+
+    def report(self, users, elapsed, json_path):
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        for user in users:
+            for endpoint, latency, ok in user.results:
+                latencies[endpoint].append(latency * 1000)
+                errors[endpoint] += not ok
+        total = sum(len(values) for values in latencies.values())
+        if not total:
+            raise CommandError("Ни один запрос не выполнен.")
+
+        endpoints = {}
+        self.stdout.write(
+            f"\n{'эндпоинт':<46} {'запросов':>8} {'зпр/с':>7} "
+            f"{'ошибок':>7} {'p50':>7} {'p95':>7} {'p99':>7}"
+        )
+        for endpoint, values in latencies.items():
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "error_rate": round(errors[endpoint] / len(values), 4),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+            }
+            result = endpoints[endpoint]
+            self.stdout.write(
+                f"{endpoint:<46} {len(values):>8} "
+                f"{result['throughput_rps']:>7.2f} "
+                f"{result['error_rate']:>7.1%} {result['p50_ms']:>7.1f} "
+                f"{result['p95_ms']:>7.1f} {result['p99_ms']:>7.1f}"
+            )
+        all_latencies = [
+            value for values in latencies.values() for value in values]
+        summary = {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 1),
+            "error_rate": round(sum(errors.values()) / total, 4),
+            "p50_ms": round(percentile(all_latencies, 50), 2),
+            "p95_ms": round(percentile(all_latencies, 95), 2),
+            "p99_ms": round(percentile(all_latencies, 99), 2),
+            "skipped": sum(user.skipped for user in users),
+        }
+        self.stdout.write(
+            f"\nВсего: {total} запросов за {summary['duration_s']} с, "
+            f"{summary['throughput_rps']} запросов/с, "
+            f"ошибок {summary['error_rate']:.1%}, "
+            f"p50 {summary['p50_ms']} мс, p95 {summary['p95_ms']} мс, "
+            f"p99 {summary['p99_ms']} мс, пропущено {summary['skipped']}"
+        )
+        if json_path:
+            json_path.write_text(json.dumps(
+                {"summary": summary, "endpoints": endpoints},
+                ensure_ascii=False, indent=2,
+            ))
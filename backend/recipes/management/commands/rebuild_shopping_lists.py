@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает агрегированные списки покупок по корзинам."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только проверить расхождения, ничего не изменяя.",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Ограничиться пользователем с указанным id.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"]
+        mismatches = shopping_list.find_mismatches(user_ids)
+
+        if options["verify"]:
+            for user_id, ingredient_id in mismatches:
+                self.stdout.write(
+                    f"user={user_id} ingredient={ingredient_id}")
+            if mismatches:
+                raise CommandError(f"Расхождений: {len(mismatches)}")
+            self.stdout.write(self.style.SUCCESS("Расхождений нет."))
+            return
+
+        created = shopping_list.rebuild(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Исправлено расхождений: {len(mismatches)}, "
+                f"позиций в списках: {created}."
+            )
+        )
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counter
+
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Исправляет расхождения в счётчиках избранного, "
+        "рецептов и подписчиков."
+    )
+
+    def handle(self, *args, **options):
+        counters = [
+            (Recipe, "favorites_count", Favorite, "recipe"),
+            (User, "recipes_count", Recipe, "author"),
+            (User, "followers_count", Subscription, "author"),
+        ]
+        for model, field, related_model, related_field in counters:
+            fixed = reconcile_counter(
+                model, field, related_model, related_field)
+            self.stdout.write(
+                f"{model._meta.model_name}.{field}: исправлено {fixed}")
@@ -0,0 +1,236 @@
+import io
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from core.constatns import MAX_NAME_LENGTH
+
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag, TimelineEntry)
+from users.models import Subscription
+
+User = get_user_model()
+
+DOMAIN = "synthetic.foodgram.local"
+PASSWORD = "synthetic-password"
+IMAGE_NAME = "recipes/images/synthetic.jpg"
+BATCH_SIZE = 1000
+
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Пётр", "Ольга", "Алексей",
+               "Елена", "Дмитрий", "Наталья", "Сергей")
+LAST_NAMES = ("Иванова", "Петров", "Смирнова", "Кузнецов", "Попова",
+              "Соколов", "Лебедева", "Козлов", "Новикова", "Морозов")
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500, 1000)
+
+
+def get_image():
+    """Одно общее изображение для всех синтетических рецептов."""
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), (200, 120, 60)).save(buffer, "JPEG")
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+def weights(count):
+    """Веса по закону Ципфа: немногие авторы и рецепты популярнее."""
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def pick(rng, population, population_weights, count, exclude=None):
+    """До count разных элементов population с учётом весов."""
+    count = min(count, len(population) - (exclude is not None))
+    chosen = set()
+    while len(chosen) < count:
+        for item in rng.choices(population, population_weights,
+                                k=count - len(chosen)):
+            if item != exclude:
+                chosen.add(item)
+    return chosen
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, рецептами, "
+        "подписками, избранным и корзинами для нагрузочных тестов. "
+        "Ингредиенты и теги берутся из data/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument(
+            "--favorites", type=int, default=20,
+            help="Рецептов в избранном у каждого пользователя.",
+        )
+        parser.add_argument(
+            "--subscriptions", type=int, default=10,
+            help="Подписок у каждого пользователя.",
+        )
+        parser.add_argument(
+            "--cart", type=int, default=3,
+            help="Рецептов в корзине у каждого пользователя.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Сначала удалить ранее созданные синтетические данные.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 2 or options["recipes"] < 1:
+            raise CommandError("Нужно хотя бы 2 пользователя и 1 рецепт.")
+        synthetic_users = User.objects.filter(email__endswith=f"@{DOMAIN}")
+        if options["clear"]:
+            synthetic_users.delete()
+        elif synthetic_users.exists():
+            raise CommandError(
+                "Синтетические данные уже есть, используйте --clear.")
+        if not Ingredient.objects.exists() or not Tag.objects.exists():
+            call_command("load_catalog", stdout=self.stdout)
+
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        with transaction.atomic():
+            user_ids = self.create_users(options["users"])
+            recipes = self.create_recipes(rng, user_ids, options["recipes"])
+            self.create_relations(rng, user_ids, recipes, options)
+        # Массовая вставка не вызывает сигналы: пересчитываем
+        # счётчики и списки покупок.
+        call_command("reconcile_counters", stdout=self.stdout)
+        call_command("rebuild_shopping_lists", stdout=self.stdout)
+        self.stdout.write(
+            f"Пользователей: {len(user_ids)}, рецептов: {len(recipes)} "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    email=f"user{number}@{DOMAIN}",
+                    username=f"synthetic{number}",
+                    first_name=FIRST_NAMES[number % len(FIRST_NAMES)],
+                    last_name=LAST_NAMES[number // 10 % len(LAST_NAMES)],
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return list(
+            User.objects.filter(email__endswith=f"@{DOMAIN}")
+            .order_by("pk").values_list("pk", flat=True)
+        )
+
+    def create_recipes(self, rng, user_ids, count):
+        ingredients = list(Ingredient.objects.values_list("pk", "name"))
+        image = get_image()
+        now = timezone.now()
+        authors = rng.choices(user_ids, weights(len(user_ids)), k=count)
+        recipes = []
+        for author_id in authors:
+            first, second = rng.sample(ingredients, 2)
+            recipes.append(Recipe(
+                author_id=author_id,
+                name=f"{first[1].capitalize()} с {second[1]}"[
+                    :MAX_NAME_LENGTH],
+                text=f"Смешать {first[1]} и {second[1]}, довести до "
+                     f"готовности и подать.",
+                cooking_time=rng.randint(5, 180),
+                image=image,
+            ))
+        recipes = Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+        # pub_date с auto_now_add заполняется при вставке текущим
+        # временем, поэтому даты публикации задаются отдельно.
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                seconds=rng.randint(0, 365 * 24 * 60 * 60))
+        Recipe.objects.bulk_update(
+            recipes, ["pub_date"], batch_size=BATCH_SIZE)
+
+        tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        ingredient_ids = [pk for pk, _ in ingredients]
+        IngredientInRecipe.objects.bulk_create(
+            (
+                IngredientInRecipe(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient_id,
+                    amount=rng.choice(AMOUNTS),
+                )
+                for recipe in recipes
+                for ingredient_id in rng.sample(
+                    ingredient_ids, rng.randint(3, 10))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in rng.sample(tag_ids, rng.randint(1, 3))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return recipes
+
+    def create_relations(self, rng, user_ids, recipes, options):
+        recipe_ids = [recipe.pk for recipe in recipes]
+        recipe_weights = weights(len(recipe_ids))
+        rng.shuffle(recipe_ids)
+        by_author = defaultdict(list)
+        for recipe in recipes:
+            by_author[recipe.author_id].append(recipe)
+        authors = sorted(by_author, key=lambda pk: -len(by_author[pk]))
+
+        for model, count in ((Favorite, options["favorites"]),
+                             (ShoppingCart, options["cart"])):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in pick(
+                        rng, recipe_ids, recipe_weights, count)
+                ),
+                batch_size=BATCH_SIZE,
+            )
+
+        subscriptions = [
+            (user_id, author_id)
+            for user_id in user_ids
+            for author_id in pick(
+                rng, authors, weights(len(authors)),
+                options["subscriptions"], exclude=user_id)
+        ]
+        Subscription.objects.bulk_create(
+            (
+                Subscription(user_id=user_id, author_id=author_id)
+                for user_id, author_id in subscriptions
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    follower_id=user_id,
+                    recipe_id=recipe.pk,
+                    author_id=author_id,
+                    pub_date=recipe.pub_date,
+                )
+                for user_id, author_id in subscriptions
+                for recipe in by_author[author_id]
+            ),
+            batch_size=BATCH_SIZE,
+        )
@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    ShoppingListItem = apps.get_model("recipes", "ShoppingListItem")
+    rows = (
+        ShoppingCart.objects.filter(recipe__ingredient_links__isnull=False)
+        .values("user", "recipe__ingredient_links__ingredient")
+        .annotate(total=Sum("recipe__ingredient_links__amount"))
+    )
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=row["user"],
+            ingredient_id=row["recipe__ingredient_links__ingredient"],
+            amount=row["total"],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.PositiveIntegerField(verbose_name="Количество")),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list_items",
+                        to="recipes.ingredient",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list_items",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Позиция списка покупок",
+                "verbose_name_plural": "Список покупок",
+                "unique_together": {("user", "ingredient")},
+            },
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
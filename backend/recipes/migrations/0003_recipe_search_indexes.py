@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 16:59
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import (AddIndexConcurrently,
+                                                TrigramExtension)
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0002_shoppinglistitem"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "name", "text", config="russian"
+                ),
+                name="recipe_search_vector_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, unique=True)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Версия справочника",
+                "verbose_name_plural": "Версии справочников",
+            },
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 17:03
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0004_recipe_updated_at_catalogversion"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+        ),
+    ]
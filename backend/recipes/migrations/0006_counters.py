@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-18 17:04
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def reconcile_counter(model, field, related_model, related_field):
+    # Копия запроса на момент миграции, без импорта кода приложения.
+    actual = Coalesce(
+        Subquery(
+            related_model.objects.filter(**{related_field: OuterRef("pk")})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    model.objects.annotate(actual=actual).exclude(
+        **{field: F("actual")}).update(**{field: actual})
+
+
+def fill_counters(apps, schema_editor):
+    Favorite = apps.get_model("recipes", "Favorite")
+    Recipe = apps.get_model("recipes", "Recipe")
+    reconcile_counter(Recipe, "favorites_count", Favorite, "recipe")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_recipe_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 17:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShortLink",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "code",
+                    models.CharField(max_length=32, unique=True, verbose_name="Код"),
+                ),
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="short_link",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Короткая ссылка",
+                "verbose_name_plural": "Короткие ссылки",
+            },
+        ),
+    ]
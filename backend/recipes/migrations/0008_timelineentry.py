@@ -0,0 +1,102 @@
+# Generated by Django 4.2 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Subscription = apps.get_model("users", "Subscription")
+    TimelineEntry = apps.get_model("recipes", "TimelineEntry")
+    subscriptions = Subscription.objects.filter(author__isnull=False)
+    for follower_id, author_id in subscriptions.values_list(
+        "user_id", "author_id"
+    ).iterator():
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    follower_id=follower_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for recipe_id, pub_date in Recipe.objects.filter(
+                    author_id=author_id
+                ).values_list("pk", "pub_date")
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0007_shortlink"),
+        ("users", "0002_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("pub_date", models.DateTimeField(verbose_name="Дата публикации")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "follower",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="recipes.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись ленты",
+                "verbose_name_plural": "Ленты подписок",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["follower", "-pub_date", "-recipe"],
+                name="timeline_follower_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["follower", "author"], name="timeline_follower_author_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="timelineentry",
+            unique_together={("follower", "recipe")},
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
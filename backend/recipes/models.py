@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 
 from core.constatns import (MAX_MEASUREMENT_UNIT_LENGTH, MAX_NAME_LENGTH,
-                            MAX_SLUG_LENGTH)
+                            MAX_SHORT_CODE_LENGTH, MAX_SLUG_LENGTH,
+                            SEARCH_CONFIG)
+from core.counters import CounterFieldsMixin
 
 User = get_user_model()
 
@@ -42,7 +46,7 @@ class Ingredient(models.Model):
         return f"{self.name}, {self.measurement_unit}"
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         related_name="recipes",
@@ -65,11 +69,31 @@ class Recipe(models.Model):
         Tag, related_name="recipes", verbose_name="Теги")
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name="Дата публикации")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения")
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В избранном")
+
+    counter_fields = ("favorites_count",)
 
     class Meta:
         ordering = ["-pub_date"]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            GinIndex(
+                SearchVector("name", "text", config=SEARCH_CONFIG),
+                name="recipe_search_vector_idx",
+            ),
+            GinIndex(
+                fields=["name"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -121,3 +145,97 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.user} -> {self.recipe}"
+
+
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в корзине пользователя."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="shopping_list_items"
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+    )
+    amount = models.PositiveIntegerField(verbose_name="Количество")
+
+    class Meta:
+        unique_together = ("user", "ingredient")
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Список покупок"
+
+    def __str__(self):
+        return f"{self.user}: {self.ingredient} — {self.amount}"
+
+
+class CatalogVersion(models.Model):
+    """Счётчик изменений таблицы-справочника для HTTP-валидаторов."""
+
+    name = models.CharField(max_length=MAX_SLUG_LENGTH, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Версия справочника"
+        verbose_name_plural = "Версии справочников"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+class ShortLink(models.Model):
+    """Короткий код ссылки на рецепт (/r/<code>/)."""
+
+    code = models.CharField(
+        max_length=MAX_SHORT_CODE_LENGTH, unique=True, verbose_name="Код")
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="short_link",
+        verbose_name="Рецепт",
+    )
+
+    class Meta:
+        verbose_name = "Короткая ссылка"
+        verbose_name_plural = "Короткие ссылки"
+
+    def __str__(self):
+        return self.code
+
+
+class TimelineEntry(models.Model):
+    """
+    Рецепт в ленте подписчика его автора. Записи создаются при
+    публикации рецепта и при подписке, поэтому лента читается
+    по индексу (follower, pub_date) без сортировки рецептов авторов.
+    """
+
+    follower = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        unique_together = ("follower", "recipe")
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Ленты подписок"
+        indexes = [
+            models.Index(
+                fields=["follower", "-pub_date", "-recipe"],
+                name="timeline_follower_date_idx",
+            ),
+            models.Index(
+                fields=["follower", "author"],
+                name="timeline_follower_author_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.follower}: {self.recipe}"
@@ -0,0 +1,104 @@
+"""
+Кеш пользовательски-независимой части сериализованного рецепта.
+
+Ключ включает всё, от чего зависит представление: Recipe.updated_at,
+отпечаток полей автора, версии справочников тегов и ингредиентов
+и адрес сайта (ссылки на изображения абсолютные). Поэтому устаревшая
+запись просто перестаёт запрашиваться — это корректно и при
+отдельном кеше в каждом процессе gunicorn. Изменения ингредиентов
+и тегов рецепта, сделанные в обход RecipeWriteSerializer, обновляют
+updated_at через сигналы (см. touch_recipes).
+"""
+import hashlib
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.constatns import RECIPE_CACHE_TIMEOUT
+
+from . import versions
+from .models import Recipe
+
+AUTHOR_FIELDS = ("email", "username", "first_name", "last_name", "avatar")
+
+_pending = threading.local()
+
+
+def get_catalog_versions(request):
+    """Версии справочников, один запрос на HTTP-запрос."""
+    catalog_versions = getattr(request, "_catalog_versions", None)
+    if catalog_versions is None:
+        catalog_versions = tuple(
+            version
+            for version, _ in versions.get_versions(
+                versions.TAGS, versions.INGREDIENTS
+            ).values()
+        )
+        if request is not None:
+            request._catalog_versions = catalog_versions
+    return catalog_versions
+
+
+def get_key(recipe, request, variant=""):
+    author = recipe.author
+    fingerprint = hashlib.md5(
+        "|".join(
+            str(getattr(author, field)) for field in AUTHOR_FIELDS
+        ).encode()
+    ).hexdigest()
+    host = request.build_absolute_uri("/") if request else ""
+    variant = f"{host}|{variant}"
+    return "recipe:{}:{}:{}:{}:{}".format(
+        recipe.pk,
+        recipe.updated_at.timestamp(),
+        fingerprint,
+        ".".join(map(str, get_catalog_versions(request))),
+        hashlib.md5(variant.encode()).hexdigest(),
+    )
+
+
+def get_many(recipes, request, variant=""):
+    """
+    {pk: данные} для рецептов, найденных в кеше. variant различает
+    представления одного рецепта (например, набор полей).
+    """
+    keys = {
+        get_key(recipe, request, variant): recipe.pk for recipe in recipes
+    }
+    return {
+        keys[key]: data for key, data in cache.get_many(list(keys)).items()
+    }
+
+
+def set_many(payloads, request, variant=""):
+    """Сохраняет {recipe: данные} в кеш."""
+    cache.set_many(
+        {
+            get_key(recipe, request, variant): data
+            for recipe, data in payloads.items()
+        },
+        RECIPE_CACHE_TIMEOUT,
+    )
+
+
+def _touch_pending():
+    recipe_ids = getattr(_pending, "recipe_ids", None)
+    if recipe_ids:
+        _pending.recipe_ids = set()
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now())
+
+
+def touch_recipes(recipe_ids):
+    """
+    Обновляет Recipe.updated_at после фиксации транзакции.
+
+    Изменения внутри одной транзакции объединяются в один UPDATE:
+    первый из отложенных обработчиков забирает все накопленные id.
+    """
+    if not hasattr(_pending, "recipe_ids"):
+        _pending.recipe_ids = set()
+    _pending.recipe_ids.update(recipe_ids)
+    transaction.on_commit(_touch_pending)
@@ -1,17 +1,166 @@
-from import_export import resources
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from import_export import fields, resources, widgets
+from import_export.instance_loaders import CachedInstanceLoader
+from import_export.results import RowResult
 
-from .models import Ingredient, Tag
+from . import shopping_list, versions
+from .ingredient_index import ingredient_index
+from .models import Ingredient, IngredientInRecipe, Recipe, Tag
 
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+class CatalogResource(resources.ModelResource):
+    """
+    Справочник импортируется пачками через bulk_create/bulk_update,
+    поэтому сигналы моделей не срабатывают и версия справочника
+    обновляется после импорта.
+    """
+
+    catalog = None
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if self._is_dry_run(kwargs):
+            return
+        if any(result.totals[import_type] for import_type in (
+            RowResult.IMPORT_TYPE_NEW,
+            RowResult.IMPORT_TYPE_UPDATE,
+            RowResult.IMPORT_TYPE_DELETE,
+        )):
+            versions.bump(self.catalog)
+
+    class Meta:
+        use_bulk = True
+        batch_size = BATCH_SIZE
+        chunk_size = BATCH_SIZE
+        skip_unchanged = True
+        report_skipped = False
+        skip_diff = True
+        instance_loader_class = CachedInstanceLoader
+
+
+class TagResource(CatalogResource):
+    catalog = versions.TAGS
 
-class TagResource(resources.ModelResource):
     class Meta:
         model = Tag
         fields = ("id", "name", "slug")
         export_order = ("id", "name", "slug")
 
 
-class IngredientResource(resources.ModelResource):
+class IngredientResource(CatalogResource):
+    catalog = versions.INGREDIENTS
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not self._is_dry_run(kwargs):
+            ingredient_index.invalidate()
+
     class Meta:
         model = Ingredient
         fields = ("id", "name", "measurement_unit")
         export_order = ("id", "name", "measurement_unit")
+
+
+class IngredientsWidget(widgets.Widget):
+    """
+    Ингредиенты рецепта в виде «название:единица:количество; ...».
+    """
+
+    separator = "; "
+
+    def clean(self, value, row=None, **kwargs):
+        items = []
+        for item in filter(None, (value or "").split(";")):
+            try:
+                name, unit, amount = item.strip().rsplit(":", 2)
+                items.append((name.strip(), unit.strip(), int(amount)))
+            except ValueError:
+                raise ValueError(
+                    f"Неверный формат ингредиента: {item.strip()!r}")
+        return items
+
+    def render(self, value, obj=None, **kwargs):
+        return self.separator.join(
+            f"{link.ingredient.name}:{link.ingredient.measurement_unit}:"
+            f"{link.amount}"
+            for link in value.all()
+        )
+
+
+class RecipeResource(resources.ModelResource):
+    """Рецепты вместе с тегами и ингредиентами."""
+
+    author = fields.Field(
+        attribute="author",
+        column_name="author",
+        widget=widgets.ForeignKeyWidget(User, field="email"),
+    )
+    tags = fields.Field(
+        attribute="tags",
+        column_name="tags",
+        widget=widgets.ManyToManyWidget(Tag, field="slug"),
+    )
+    ingredients = fields.Field(
+        attribute="ingredient_links",
+        column_name="ingredients",
+        widget=IngredientsWidget(),
+        readonly=True,
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ("id", "name", "author", "text", "cooking_time", "image",
+                  "tags", "ingredients")
+        export_order = ("id", "name", "author", "text", "cooking_time",
+                        "image", "tags", "ingredients")
+        chunk_size = BATCH_SIZE
+
+    def get_queryset(self):
+        return Recipe.objects.select_related("author").prefetch_related(
+            "tags", "ingredient_links__ingredient"
+        )
+
+    def before_import_row(self, row, **kwargs):
+        items = IngredientsWidget().clean(row.get("ingredients"))
+        if not items:
+            raise ValueError("Нужно указать хотя бы один ингредиент.")
+        query = Q()
+        for name, unit, _ in items:
+            query |= Q(name=name, measurement_unit=unit)
+        found = {
+            (ingredient.name, ingredient.measurement_unit): ingredient.pk
+            for ingredient in Ingredient.objects.filter(query)
+        }
+        missing = [
+            f"{name}:{unit}" for name, unit, _ in items
+            if (name, unit) not in found
+        ]
+        if missing:
+            raise ValueError(
+                "Ингредиенты не найдены: {}.".format(", ".join(missing)))
+        row["_amounts"] = {
+            found[name, unit]: amount for name, unit, amount in items
+        }
+
+    def after_save_instance(self, instance, row, **kwargs):
+        if self._is_dry_run(kwargs) and not self._is_using_transactions(
+                kwargs):
+            return
+        old_amounts = shopping_list.get_recipe_amounts(instance)
+        new_amounts = row["_amounts"]
+        if old_amounts == new_amounts:
+            return
+        # Удаление связей учитывают сигналы, bulk_create — нет.
+        instance.ingredient_links.all().delete()
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=instance, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new_amounts.items()
+        )
+        shopping_list.update_recipe(instance.pk, {}, new_amounts)
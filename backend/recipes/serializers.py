@@ -1,18 +1,39 @@
+import hashlib
+import json
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
-from api.serializers import UserSerializer
-from core.fields import Base64ImageField
+from api.serializers import UserSerializer, get_subscribed_author_ids
+from core import renditions
+from core.fields import Base64ImageField, ImageSrcSetField, SrcSetMixin
+from core.metrics import SerializerMetricsMixin
 
+from . import payload_cache, shopping_list
 from .models import Ingredient, IngredientInRecipe, Recipe, Tag
 
+User = get_user_model()
+
+
+def get_digest(file):
+    """MD5 файла, прочитанного по частям."""
+    digest = hashlib.md5()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.digest()
 
-class IngredientSerializer(serializers.ModelSerializer):
+
+class IngredientSerializer(SerializerMetricsMixin,
+                           serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ["id", "name", "measurement_unit"]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SerializerMetricsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name", "slug"]
@@ -29,13 +50,25 @@ class IngredientInRecipeReadSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "measurement_unit", "amount"]
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(SerializerMetricsMixin,
+                           serializers.ListSerializer):
+    """Читает из кеша все рецепты страницы одним обращением."""
+
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, "all") else data)
+        self.child.load_payloads(recipes)
+        return [self.child.to_representation(recipe) for recipe in recipes]
+
+
+class RecipeReadSerializer(SerializerMetricsMixin, SrcSetMixin,
+                           serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = IngredientInRecipeReadSerializer(
         source="ingredient_links", many=True)
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_srcset = ImageSrcSetField(source="image")
 
     class Meta:
         model = Recipe
@@ -48,25 +81,190 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_srcset",
             "text",
             "cooking_time",
         ]
+        list_serializer_class = RecipeListSerializer
+
+    def load_payloads(self, recipes):
+        """
+        Заполняет self.payloads данными рецептов без пользовательских
+        флагов: из кеша, а для промахов — сериализацией с догрузкой
+        тегов и ингредиентов одним запросом на связь.
+        """
+        request = self.context.get("request")
+        variant = ",".join(self.fields)
+        self.payloads = payload_cache.get_many(recipes, request, variant)
+        missing = [
+            recipe for recipe in recipes if recipe.pk not in self.payloads
+        ]
+        if not missing:
+            return
+        # Порядок ингредиентов как в RecipeRowsSerializer.
+        prefetch_related_objects(
+            missing,
+            "tags",
+            Prefetch(
+                "ingredient_links",
+                queryset=IngredientInRecipe.objects.order_by("pk"),
+            ),
+            "ingredient_links__ingredient",
+        )
+        rendered = {
+            recipe: super(RecipeReadSerializer, self).to_representation(
+                recipe)
+            for recipe in missing
+        }
+        payload_cache.set_many(rendered, request, variant)
+        self.payloads.update(
+            (recipe.pk, data) for recipe, data in rendered.items())
+
+    def to_representation(self, instance):
+        payloads = getattr(self, "payloads", {})
+        if instance.pk not in payloads:
+            self.load_payloads([instance])
+        data = self.payloads[instance.pk]
+
+        author_ids = get_subscribed_author_ids(self.context.get("request"))
+        return {
+            **data,
+            "author": {
+                **data["author"],
+                "is_subscribed": instance.author_id in author_ids,
+            },
+            "is_favorited": self.get_is_favorited(instance),
+            "is_in_shopping_cart": self.get_is_in_shopping_cart(instance),
+        }
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         user = self.context.get("request").user
         if not user.is_authenticated:
             return False
         return obj.favorites.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         user = self.context.get("request").user
         if not user.is_authenticated:
             return False
         return obj.shopping_carts.filter(user=user).exists()
 
 
+class RecipeRowsSerializer(SerializerMetricsMixin,
+                           serializers.BaseSerializer):
+    """
+    Список рецептов только для чтения из строк values() с полями
+    row_fields, без создания моделей и вложенных сериализаторов.
+
+    Теги, ингредиенты и подписки загружаются одним запросом на связь
+    и группируются по id рецепта, данные автора строятся один раз
+    на автора. Результат совпадает с RecipeReadSerializer(many=True).
+    """
+
+    row_fields = (
+        "id",
+        "name",
+        "image",
+        "text",
+        "cooking_time",
+        "is_favorited",
+        "is_in_shopping_cart",
+        "author_id",
+        "author__email",
+        "author__username",
+        "author__first_name",
+        "author__last_name",
+        "author__avatar",
+    )
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+        request = self.context.get("request")
+        build_url = request.build_absolute_uri if request else str
+        srcset = bool(request and request.query_params.get("srcset"))
+        image_storage = Recipe._meta.get_field("image").storage
+        avatar_storage = User._meta.get_field("avatar").storage
+        author_ids = get_subscribed_author_ids(request)
+        recipe_ids = [row["id"] for row in rows]
+
+        tags = defaultdict(list)
+        for recipe_id, tag_id, name, slug in (
+            Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("tag__name")
+            .values_list("recipe_id", "tag_id", "tag__name", "tag__slug")
+        ):
+            tags[recipe_id].append({"id": tag_id, "name": name, "slug": slug})
+
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id, name, unit, amount in (
+            IngredientInRecipe.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("pk")
+            .values_list(
+                "recipe_id",
+                "ingredient_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        ):
+            ingredients[recipe_id].append({
+                "id": ingredient_id,
+                "name": name,
+                "measurement_unit": unit,
+                "amount": amount,
+            })
+
+        authors = {}
+        data = []
+        for row in rows:
+            author = authors.get(row["author_id"])
+            if author is None:
+                avatar = row["author__avatar"]
+                author = authors[row["author_id"]] = {
+                    "email": row["author__email"],
+                    "id": row["author_id"],
+                    "username": row["author__username"],
+                    "first_name": row["author__first_name"],
+                    "last_name": row["author__last_name"],
+                    "is_subscribed": row["author_id"] in author_ids,
+                    "avatar": (
+                        build_url(avatar_storage.url(avatar))
+                        if avatar else None
+                    ),
+                }
+            image = row["image"]
+            recipe = {
+                "id": row["id"],
+                "tags": tags[row["id"]],
+                "author": author,
+                "ingredients": ingredients[row["id"]],
+                "is_favorited": row["is_favorited"],
+                "is_in_shopping_cart": row["is_in_shopping_cart"],
+                "name": row["name"],
+                "image": (
+                    build_url(image_storage.url(image)) if image else None
+                ),
+            }
+            if srcset:
+                recipe["image_srcset"] = (
+                    renditions.get_srcset(image, build_url)
+                    if image else None
+                )
+            recipe["text"] = row["text"]
+            recipe["cooking_time"] = row["cooking_time"]
+            data.append(recipe)
+        return data
+
+
 class IngredientInRecipeWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    # Ингредиенты загружаются одним запросом в RecipeWriteSerializer.
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -75,8 +273,7 @@ class IngredientInRecipeWriteSerializer(serializers.ModelSerializer):
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = IngredientInRecipeWriteSerializer(many=True)
     image = Base64ImageField()
 
@@ -85,6 +282,31 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "text", "image",
                   "cooking_time", "ingredients", "tags"]
 
+    def to_internal_value(self, data):
+        if hasattr(data, "getlist"):
+            # multipart/form-data: теги — повторяющееся поле,
+            # ингредиенты — JSON-строка, изображение — файл.
+            ingredients = data.get("ingredients")
+            data = {**data.dict(), "tags": data.getlist("tags")}
+            if ingredients is not None:
+                try:
+                    data["ingredients"] = json.loads(ingredients)
+                except (TypeError, ValueError):
+                    raise serializers.ValidationError(
+                        {"ingredients": "Ожидался JSON-список ингредиентов."}
+                    )
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def get_objects(model, ids):
+        """
+        Загружает объекты model по ids одним запросом.
+        Возвращает найденные объекты и список неизвестных id.
+        """
+        objects = model.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in objects]
+        return [objects[pk] for pk in ids if pk in objects], missing
+
     def validate(self, attrs):
         ingredients = attrs.get("ingredients")
         if not ingredients:
@@ -92,32 +314,26 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 {"ingredients": "Нужно указать хотя бы один ингредиент."}
             )
 
-        ingredient_ids = []
-        for item in ingredients:
-            ingredient_id = item["id"].id
-            if ingredient_id in ingredient_ids:
-                raise serializers.ValidationError(
-                    {"ingredients": "Ингредиенты не должны повторяться."}
-                )
-            ingredient_ids.append(ingredient_id)
-
-            if item["amount"] < 1:
-                raise serializers.ValidationError(
-                    {
-                        "ingredients": (
-                            "Количество каждого ингредиента"
-                            " должно быть больше 0."
-                        )
-                    }
-                )
+        ingredient_ids = [item["id"] for item in ingredients]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise serializers.ValidationError(
+                {"ingredients": "Ингредиенты не должны повторяться."}
+            )
+        if any(item["amount"] < 1 for item in ingredients):
+            raise serializers.ValidationError(
+                {
+                    "ingredients": (
+                        "Количество каждого ингредиента"
+                        " должно быть больше 0."
+                    )
+                }
+            )
 
-        tags = attrs.get("tags")
-        if not tags:
+        tag_ids = attrs.get("tags")
+        if not tag_ids:
             raise serializers.ValidationError(
                 {"tags": "Нужно указать хотя бы один тег."}
             )
-
-        tag_ids = [tag.id for tag in tags]
         if len(tag_ids) != len(set(tag_ids)):
             raise serializers.ValidationError(
                 {"tags": "Теги не должны повторяться."})
@@ -128,6 +344,23 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 {"cooking_time": "Время приготовления должно быть больше 0."}
             )
 
+        errors = {}
+        found, missing = self.get_objects(Ingredient, ingredient_ids)
+        if missing:
+            errors["ingredients"] = "Ингредиенты не найдены: {}.".format(
+                ", ".join(map(str, missing))
+            )
+        else:
+            for item, ingredient in zip(ingredients, found):
+                item["id"] = ingredient
+        attrs["tags"], missing = self.get_objects(Tag, tag_ids)
+        if missing:
+            errors["tags"] = "Теги не найдены: {}.".format(
+                ", ".join(map(str, missing))
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+
         return attrs
 
     def create_ingredients(self, ingredients, recipe):
@@ -152,17 +385,98 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @staticmethod
+    def is_same_image(stored, uploaded):
+        """Совпадает ли загруженное изображение с сохранённым."""
+        if not stored:
+            return False
+        # Сохранённого файла может не быть на диске.
+        try:
+            if stored.size != uploaded.size:
+                return False
+            with stored.open("rb") as stored_file:
+                stored_digest = get_digest(stored_file)
+        except OSError:
+            return False
+        uploaded_digest = get_digest(uploaded)
+        uploaded.seek(0)
+        return stored_digest == uploaded_digest
+
+    def update_ingredients(self, instance, ingredients):
+        """
+        Приводит ингредиенты рецепта к ingredients, изменяя только
+        отличающиеся строки. Возвращает True, если что-то изменилось.
+        """
+        links = {
+            link.ingredient_id: link
+            for link in instance.ingredient_links.all()
+        }
+        new_amounts = {item["id"].id: item["amount"] for item in ingredients}
+        # Удалённые связи вычитают из списков покупок сигналы,
+        # bulk_update и bulk_create их не вызывают.
+        old_amounts = {
+            ingredient_id: link.amount
+            for ingredient_id, link in links.items()
+            if ingredient_id in new_amounts
+        }
+
+        to_delete = [
+            link.pk
+            for ingredient_id, link in links.items()
+            if ingredient_id not in new_amounts
+        ]
+        to_update = []
+        for ingredient_id, amount in new_amounts.items():
+            link = links.get(ingredient_id)
+            if link is not None and link.amount != amount:
+                link.amount = amount
+                to_update.append(link)
+        to_create = [
+            item for item in ingredients if item["id"].id not in links
+        ]
+        if not (to_delete or to_update or to_create):
+            return False
+
+        IngredientInRecipe.objects.filter(pk__in=to_delete).delete()
+        IngredientInRecipe.objects.bulk_update(to_update, ["amount"])
+        self.create_ingredients(to_create, instance)
+        shopping_list.update_recipe(instance.pk, old_amounts, new_amounts)
+        return True
+
+    def update_tags(self, instance, tags):
+        """Добавляет и удаляет только изменившиеся теги."""
+        current = set(instance.tags.values_list("pk", flat=True))
+        new = {tag.pk for tag in tags}
+        if current == new:
+            return False
+        if current - new:
+            instance.tags.remove(*(current - new))
+        if new - current:
+            instance.tags.add(*(new - current))
+        return True
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        image = validated_data.get("image")
+        if image is not None and self.is_same_image(instance.image, image):
+            validated_data.pop("image")
 
-        instance.tags.set(tags)
-        instance.ingredient_links.all().delete()
-        self.create_ingredients(ingredients, instance)
+        changed_fields = [
+            attr
+            for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        ]
+        for attr in changed_fields:
+            setattr(instance, attr, validated_data[attr])
+
+        ingredients_changed = self.update_ingredients(instance, ingredients)
+        tags_changed = self.update_tags(instance, tags)
+
+        if changed_fields or ingredients_changed or tags_changed:
+            instance.save(update_fields=[*changed_fields, "updated_at"])
 
         return instance
 
@@ -170,7 +484,10 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(SerializerMetricsMixin, SrcSetMixin,
+                            serializers.ModelSerializer):
+    image_srcset = ImageSrcSetField(source="image")
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_srcset", "cooking_time")
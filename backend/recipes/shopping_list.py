@@ -0,0 +1,179 @@
+"""
+Поддержка агрегированного списка покупок.
+
+ShoppingListItem хранит уже просуммированные количества ингредиентов
+из всех рецептов корзины пользователя, поэтому выгрузка списка —
+одно чтение. Таблицу обновляют обработчики сигналов ShoppingCart,
+IngredientInRecipe и Recipe (см. signals.py), так что её не обходят
+ни админка, ни каскадные удаления. bulk_create и bulk_update сигналов
+не вызывают: код, который ими пользуется, вызывает update_recipe сам.
+"""
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .models import IngredientInRecipe, ShoppingCart, ShoppingListItem
+
+BATCH_SIZE = 500
+
+
+def get_recipe_amounts(recipe_id):
+    """Количества ингредиентов рецепта: {ingredient_id: amount}."""
+    return Counter(
+        dict(
+            IngredientInRecipe.objects.filter(recipe_id=recipe_id)
+            .values_list("ingredient_id", "amount")
+        )
+    )
+
+
+def add_amounts(user_ids, amounts):
+    """
+    Прибавляет положительные amounts ({ingredient_id: количество})
+    одним INSERT ... ON CONFLICT DO UPDATE на пачку строк. Строки,
+    которых ещё нет, нельзя заблокировать select_for_update(), а так
+    параллельные первые добавления одного ингредиента складываются
+    вместо ошибки уникальности.
+    """
+    meta = ShoppingListItem._meta
+    connection = connections[router.db_for_write(ShoppingListItem)]
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    user, ingredient, amount = (
+        quote(meta.get_field(name).column)
+        for name in ("user", "ingredient", "amount")
+    )
+    rows = [
+        (user_id, ingredient_id, amounts[ingredient_id])
+        for user_id in sorted(user_ids)
+        for ingredient_id in sorted(amounts)
+    ]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({user}, {ingredient}, {amount}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT ({user}, {ingredient}) DO UPDATE "
+                f"SET {amount} = {table}.{amount} + EXCLUDED.{amount}",
+                [value for row in batch for value in row],
+            )
+
+
+def subtract_amounts(user_ids, amounts):
+    """
+    Вычитает amounts одним UPDATE, не опуская количество ниже нуля,
+    и удаляет опустевшие позиции.
+    """
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=amounts)
+    items.update(
+        amount=Greatest(
+            F("amount")
+            - Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(amount))
+                    for ingredient_id, amount in amounts.items()
+                ),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+    )
+    items.filter(amount=0).delete()
+
+
+def apply_deltas(user_ids, deltas):
+    """
+    Прибавляет deltas ({ingredient_id: количество}) к спискам покупок
+    пользователей user_ids. Позиции с нулевым остатком удаляются.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    added = {key: value for key, value in deltas.items() if value > 0}
+    removed = {key: -value for key, value in deltas.items() if value < 0}
+    with transaction.atomic():
+        if added:
+            add_amounts(user_ids, added)
+        if removed:
+            subtract_amounts(user_ids, removed)
+
+
+def add_recipe(user_id, recipe_id):
+    apply_deltas([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    amounts = get_recipe_amounts(recipe_id)
+    apply_deltas([user_id], {key: -value for key, value in amounts.items()})
+
+
+def update_recipe(recipe_id, old_amounts, new_amounts):
+    """Переносит изменение ингредиентов рецепта в списки покупок."""
+    deltas = Counter(new_amounts)
+    deltas.subtract(old_amounts)
+    apply_deltas(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            "user_id", flat=True
+        ),
+        deltas,
+    )
+
+
+def get_expected_items(user_ids=None):
+    """Списки покупок, посчитанные заново по корзинам."""
+    carts = ShoppingCart.objects.filter(
+        recipe__ingredient_links__isnull=False)
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    return {
+        (row["user"], row["recipe__ingredient_links__ingredient"]): row[
+            "total"]
+        for row in carts.values(
+            "user", "recipe__ingredient_links__ingredient"
+        ).annotate(total=Sum("recipe__ingredient_links__amount"))
+    }
+
+
+def get_stored_items(user_ids=None):
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in items.values_list(
+            "user_id", "ingredient_id", "amount"
+        )
+    }
+
+
+def find_mismatches(user_ids=None):
+    """Ключи (user_id, ingredient_id), где сохранённое значение неверно."""
+    expected = get_expected_items(user_ids)
+    stored = get_stored_items(user_ids)
+    return sorted(
+        key
+        for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    )
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Пересчитывает списки покупок с нуля. Возвращает число позиций."""
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    items.delete()
+    created = ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=user_id, ingredient_id=ingredient_id, amount=amount
+        )
+        for (user_id, ingredient_id), amount in get_expected_items(
+            user_ids
+        ).items()
+    )
+    return len(created)
@@ -0,0 +1,110 @@
+"""
+Короткие ссылки на рецепты.
+
+Код выдаётся один раз при первом запросе и хранится в ShortLink
+с уникальным индексом, поэтому переход по ссылке — это поиск по индексу,
+а не перебор рецептов. Уже разрешённые коды кешируются в памяти
+процесса (LRU), так что повторные переходы не обращаются к базе.
+
+Сигналы сбрасывают кеш только в процессе, изменившем ссылку, поэтому
+запись живёт не дольше SHORT_LINK_CACHE_TTL секунд: столько другие
+процессы могут вести по изменённой или удалённой ссылке. Проверка
+общей версии на каждом переходе стоила бы того же запроса, что и сам
+поиск по коду.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from core.constatns import (MAX_SHORT_CODE_LENGTH, SHORT_CODE_LENGTH,
+                            SHORT_LINK_CACHE_SIZE, SHORT_LINK_CACHE_TTL)
+
+from .models import ShortLink
+
+
+class LRUCache:
+    def __init__(self, maxsize=SHORT_LINK_CACHE_SIZE,
+                 ttl=SHORT_LINK_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return None
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache = LRUCache()
+
+
+def make_code(recipe_id, length=SHORT_CODE_LENGTH):
+    # Та же схема, что и у ранее выданных ссылок.
+    return hashlib.md5(
+        f"{settings.SECRET_KEY}{recipe_id}".encode()
+    ).hexdigest()[:length]
+
+
+def get_code(recipe):
+    """Код короткой ссылки рецепта; создаётся при первом обращении."""
+    code = (
+        ShortLink.objects.filter(recipe=recipe)
+        .values_list("code", flat=True)
+        .first()
+    )
+    if code is not None:
+        return code
+    # При совпадении кода с кодом другого рецепта берётся более
+    # длинный префикс того же хеша.
+    for length in range(SHORT_CODE_LENGTH, MAX_SHORT_CODE_LENGTH + 1):
+        try:
+            with transaction.atomic():
+                link, _ = ShortLink.objects.get_or_create(
+                    recipe=recipe,
+                    defaults={"code": make_code(recipe.pk, length)},
+                )
+            return link.code
+        except IntegrityError:
+            continue
+    raise IntegrityError(f"Не удалось выдать код для рецепта {recipe.pk}")
+
+
+def resolve(code):
+    """id рецепта по коду или None."""
+    recipe_id = cache.get(code)
+    if recipe_id is None:
+        recipe_id = (
+            ShortLink.objects.filter(code=code)
+            .values_list("recipe_id", flat=True)
+            .first()
+        )
+        if recipe_id is not None:
+            cache.set(code, recipe_id)
+    return recipe_id
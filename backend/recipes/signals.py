@@ -0,0 +1,185 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from core import renditions
+from core.counters import change_counter
+
+from . import shopping_list, short_links, timeline, versions
+from .ingredient_index import ingredient_index
+from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                     ShoppingCart, ShortLink, Tag)
+from .payload_cache import touch_recipes
+from jobs.queue import enqueue
+from users.models import Subscription
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    ingredient_index.invalidate()
+    versions.bump(versions.INGREDIENTS)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed(sender, **kwargs):
+    versions.bump(versions.TAGS)
+
+
+@receiver([post_save, post_delete], sender=IngredientInRecipe)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    touch_recipes([instance.recipe_id])
+
+
+def is_recipe_deleted(instance, origin):
+    """Связь удаляется каскадом вместе со своим рецептом."""
+    return instance.recipe_id in getattr(origin, "_deleted_recipe_ids", ())
+
+
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=IngredientInRecipe)
+def remember_previous(sender, instance, **kwargs):
+    """Прежнее состояние изменяемой строки для списков покупок."""
+    instance._previous = (
+        sender.objects.filter(pk=instance.pk).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+def recipe_ingredient_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    new_amounts = {instance.ingredient_id: instance.amount}
+    if previous is None:
+        shopping_list.update_recipe(instance.recipe_id, {}, new_amounts)
+        return
+    old_amounts = {previous.ingredient_id: previous.amount}
+    if previous.recipe_id == instance.recipe_id:
+        shopping_list.update_recipe(
+            instance.recipe_id, old_amounts, new_amounts)
+    else:
+        shopping_list.update_recipe(previous.recipe_id, old_amounts, {})
+        shopping_list.update_recipe(instance.recipe_id, {}, new_amounts)
+
+
+@receiver(post_delete, sender=IngredientInRecipe)
+def recipe_ingredient_deleted(sender, instance, origin=None, **kwargs):
+    if not is_recipe_deleted(instance, origin):
+        shopping_list.update_recipe(
+            instance.recipe_id, {instance.ingredient_id: instance.amount}, {})
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous is not None:
+        if (previous.user_id, previous.recipe_id) == (
+                instance.user_id, instance.recipe_id):
+            return
+        shopping_list.remove_recipe(previous.user_id, previous.recipe_id)
+    shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def cart_deleted(sender, instance, origin=None, **kwargs):
+    if not is_recipe_deleted(instance, origin):
+        shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, origin=None, **kwargs):
+    """
+    Убирает рецепт из списков покупок, пока его корзины и ингредиенты
+    ещё на месте. Порядок каскадного удаления связей не определён,
+    поэтому их обработчики пропускают рецепты, отмеченные здесь
+    на объекте, с которого началось удаление.
+    """
+    shopping_list.update_recipe(
+        instance.pk, shopping_list.get_recipe_amounts(instance.pk), {})
+    if origin is not None:
+        if not hasattr(origin, "_deleted_recipe_ids"):
+            origin._deleted_recipe_ids = set()
+        origin._deleted_recipe_ids.add(instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        touch_recipes([instance.pk])
+    elif action == "pre_clear":
+        touch_recipes(instance.recipes.values_list("pk", flat=True))
+    else:
+        touch_recipes(pk_set)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "favorites_count", 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "favorites_count", -1)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_saving(sender, instance, update_fields=None, **kwargs):
+    instance._image_changed = renditions.is_file_changed(
+        instance, "image", update_fields)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", 1)
+        enqueue("recipes.fan_out", recipe_id=instance.pk)
+    if getattr(instance, "_image_changed", False) and instance.image:
+        enqueue("recipes.generate_renditions", name=instance.image.name)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", -1)
+
+
+@receiver(pre_save, sender=ShortLink)
+def short_link_saving(sender, instance, **kwargs):
+    instance._previous_code = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("code", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=ShortLink)
+def short_link_saved(sender, instance, created, **kwargs):
+    # Код или рецепт изменили в админке.
+    if not created:
+        short_links.cache.discard(instance._previous_code)
+        short_links.cache.discard(instance.code)
+
+
+@receiver(post_delete, sender=ShortLink)
+def short_link_deleted(sender, instance, **kwargs):
+    short_links.cache.discard(instance.code)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added(sender, instance, created, **kwargs):
+    if created and instance.author_id:
+        enqueue(
+            "recipes.backfill_timeline",
+            follower_id=instance.user_id,
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_removed(sender, instance, **kwargs):
+    if instance.author_id:
+        timeline.trim(instance.user_id, instance.author_id)
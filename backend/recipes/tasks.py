@@ -0,0 +1,50 @@
+from django.utils.module_loading import import_string
+from import_export.formats import base_formats
+
+from core import renditions
+
+from . import exports, imports, timeline
+from .models import Recipe
+from jobs.queue import task
+from users.models import Subscription
+
+
+@task("recipes.generate_renditions")
+def generate_renditions(job, name):
+    return renditions.generate(name)
+
+
+@task("recipes.import_data")
+def import_data(job, resource, path, input_format, encoding="utf-8-sig"):
+    return imports.import_file(
+        job, import_string(resource), path,
+        getattr(base_formats, input_format)(), encoding,
+    )
+
+
+@task("recipes.export_data")
+def export_data(job, resource, file_format, pks=None, export_fields=None):
+    return imports.export_file(
+        job, import_string(resource), getattr(base_formats, file_format)(),
+        pks, export_fields,
+    )
+
+
+@task("recipes.export_shopping_list")
+def export_shopping_list(job, user_id):
+    return exports.save_pdf(user_id)
+
+
+@task("recipes.fan_out")
+def fan_out(job, recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is not None:
+        timeline.fan_out(recipe)
+
+
+@task("recipes.backfill_timeline")
+def backfill_timeline(job, follower_id, author_id):
+    # Подписку могли отменить, пока задача ждала в очереди.
+    if Subscription.objects.filter(
+            user_id=follower_id, author_id=author_id).exists():
+        timeline.backfill(follower_id, author_id)
@@ -0,0 +1,676 @@
+import base64
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.async_views import SubscriptionsAsyncView
+from api.views import SubscriptionsListView
+
+from . import shopping_list, short_links, versions
+from .async_views import RecipeAsyncView
+from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                     ShoppingCart, ShoppingListItem, ShortLink, Tag,
+                     TimelineEntry)
+from .serializers import RecipeReadSerializer, RecipeRowsSerializer
+from .views import RecipeViewSet
+from jobs import queue
+from jobs.models import Job
+from users.models import Subscription
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+IMAGE_NAME = "recipes/images/test.jpg"
+
+
+def make_image(color=(200, 120, 60)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()).decode()
+
+
+def create_user(number, **kwargs):
+    return User.objects.create_user(
+        email=f"user{number}@example.com",
+        username=f"user{number}",
+        first_name="Имя",
+        last_name="Фамилия",
+        password="test-password-123",
+        **kwargs,
+    )
+
+
+def create_recipe(author, amounts, tags=(), name="Рецепт"):
+    """Рецепт с ингредиентами amounts: {ingredient: количество}."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text="Описание",
+        cooking_time=10,
+        image=IMAGE_NAME,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in amounts.items()
+    )
+    recipe.tags.set(tags)
+    return recipe
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(1)
+        cls.user = create_user(2)
+        cls.tags = [
+            Tag.objects.create(name=f"Тег {number}", slug=f"tag{number}")
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {number}", measurement_unit="г")
+            for number in range(40)
+        ]
+        cls.recipe = create_recipe(
+            cls.author,
+            {cls.ingredients[0]: 100, cls.ingredients[1]: 200},
+            cls.tags[:2],
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+class ShoppingListTest(RecipesTestCase):
+    """Список покупок не расходится с корзинами при любых изменениях."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            username="admin",
+            first_name="Админ",
+            last_name="Админов",
+            password="test-password-123",
+        )
+        cls.other = create_recipe(
+            cls.user, {cls.ingredients[0]: 5, cls.ingredients[2]: 7})
+
+    def setUp(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.other)
+        self.client.force_login(self.admin)
+
+    def assertListsConsistent(self):
+        self.assertEqual(shopping_list.find_mismatches(), [])
+
+    def test_cart_changes(self):
+        self.assertEqual(
+            shopping_list.get_stored_items([self.user.pk]),
+            {
+                (self.user.pk, self.ingredients[0].pk): 105,
+                (self.user.pk, self.ingredients[1].pk): 200,
+                (self.user.pk, self.ingredients[2].pk): 7,
+            },
+        )
+        ShoppingCart.objects.filter(recipe=self.recipe).delete()
+        self.assertListsConsistent()
+
+    def test_admin_recipe_edit(self):
+        links = list(self.recipe.ingredient_links.order_by("pk"))
+        prefix = "ingredient_links"
+        response = self.client.post(
+            reverse("admin:recipes_recipe_change", args=[self.recipe.pk]),
+            {
+                "author": self.author.pk,
+                "name": self.recipe.name,
+                "text": self.recipe.text,
+                "cooking_time": self.recipe.cooking_time,
+                "tags": [tag.pk for tag in self.tags[:2]],
+                f"{prefix}-TOTAL_FORMS": 3,
+                f"{prefix}-INITIAL_FORMS": 2,
+                f"{prefix}-MIN_NUM_FORMS": 0,
+                f"{prefix}-MAX_NUM_FORMS": 1000,
+                f"{prefix}-0-id": links[0].pk,
+                f"{prefix}-0-recipe": self.recipe.pk,
+                f"{prefix}-0-ingredient": links[0].ingredient_id,
+                f"{prefix}-0-amount": 150,
+                f"{prefix}-1-id": links[1].pk,
+                f"{prefix}-1-recipe": self.recipe.pk,
+                f"{prefix}-1-ingredient": links[1].ingredient_id,
+                f"{prefix}-1-amount": links[1].amount,
+                f"{prefix}-1-DELETE": "on",
+                f"{prefix}-2-recipe": self.recipe.pk,
+                f"{prefix}-2-ingredient": self.ingredients[3].pk,
+                f"{prefix}-2-amount": 30,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            shopping_list.get_recipe_amounts(self.recipe.pk),
+            {self.ingredients[0].pk: 150, self.ingredients[3].pk: 30},
+        )
+        self.assertListsConsistent()
+
+    def test_admin_ingredient_link_edit(self):
+        link = self.recipe.ingredient_links.first()
+        link.recipe = self.other
+        link.ingredient = self.ingredients[4]
+        link.amount = 11
+        link.save()
+        self.assertListsConsistent()
+        link.delete()
+        self.assertListsConsistent()
+
+    def test_admin_cart_edit(self):
+        cart = ShoppingCart.objects.get(user=self.user, recipe=self.other)
+        cart.user = self.author
+        cart.save()
+        self.assertListsConsistent()
+        self.client.post(
+            reverse("admin:recipes_shoppingcart_add"),
+            {"user": self.author.pk, "recipe": self.recipe.pk},
+        )
+        self.assertTrue(
+            ShoppingCart.objects.filter(
+                user=self.author, recipe=self.recipe).exists())
+        self.assertListsConsistent()
+
+    def test_admin_recipe_delete(self):
+        response = self.client.post(
+            reverse("admin:recipes_recipe_delete", args=[self.recipe.pk]),
+            {"post": "yes"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Recipe.objects.filter(pk=self.recipe.pk).exists())
+        self.assertListsConsistent()
+        self.assertEqual(
+            shopping_list.get_stored_items([self.user.pk]),
+            {
+                (self.user.pk, self.ingredients[0].pk): 5,
+                (self.user.pk, self.ingredients[2].pk): 7,
+            },
+        )
+
+    def test_cascade_deletes(self):
+        self.ingredients[2].delete()
+        self.assertListsConsistent()
+        self.author.delete()
+        self.assertListsConsistent()
+        self.user.delete()
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+
+class ShoppingListExportTest(RecipesTestCase):
+    def setUp(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        self.client.force_authenticate(self.user)
+
+    def download(self, export_format):
+        return self.client.get(
+            "/api/recipes/download_shopping_cart/", {"format": export_format})
+
+    def test_txt(self):
+        response = self.download("txt")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(),
+            "Ингредиент 0 (г) — 100\nИнгредиент 1 (г) — 200",
+        )
+
+    def test_pdf_in_job(self):
+        response = self.download("pdf")
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data["id"])
+        self.assertEqual(response["Location"], f"/api/jobs/{job.pk}/")
+        # Пока задача ждёт в очереди, новая не ставится.
+        self.assertEqual(self.download("pdf").data["id"], job.pk)
+
+        result = queue.registry[job.name](job=job, **job.payload)
+        with default_storage.open(result["file"]) as file:
+            content = file.read()
+        self.assertTrue(content.startswith(b"%PDF"))
+        self.assertIn(b"DejaVu", content)
+
+    def test_unknown_format(self):
+        response = self.download("xls")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pdf", response.data["errors"])
+
+
+class CountersTest(RecipesTestCase):
+    """Полное сохранение не затирает счётчики, изменённые сигналами."""
+
+    def setUp(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Subscription.objects.create(user=self.user, author=self.author)
+        create_recipe(self.author, {})
+
+    def assertCounters(self):
+        self.author.refresh_from_db()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+        self.assertEqual(self.author.followers_count, 1)
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_full_save(self):
+        # Объекты в памяти хранят значения счётчиков до сигналов.
+        self.author.first_name = "Новое имя"
+        self.author.save()
+        self.recipe.name = "Новое название"
+        self.recipe.save()
+        self.assertCounters()
+        self.assertEqual(self.author.first_name, "Новое имя")
+        self.assertEqual(self.recipe.name, "Новое название")
+
+    def test_avatar_and_password(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.put(
+            "/api/users/me/avatar/", {"avatar": make_image()}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            "/api/users/set_password/",
+            {
+                "current_password": "test-password-123",
+                "new_password": "Another-pass-456",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertCounters()
+
+
+class RecipeListQueriesTest(RecipesTestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        authors = [cls.author, cls.user, create_user(3)]
+        for number in range(12):
+            create_recipe(
+                authors[number % len(authors)],
+                {
+                    cls.ingredients[(number + shift) % 40]: 10 + shift
+                    for shift in range(number % 4 + 1)
+                },
+                cls.tags[:number % 3 + 1],
+                name=f"Рецепт {number}",
+            )
+
+    def assertListQueries(self, queries):
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(
+                        "/api/recipes/", {"limit": limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_anonymous(self):
+        # Варианты фильтра по тегам, COUNT, страница, теги, ингредиенты.
+        self.assertListQueries(5)
+
+    def test_authenticated(self):
+        # Плюс подписки пользователя.
+        self.client.force_authenticate(self.user)
+        self.assertListQueries(6)
+
+
+class RecipeSearchPaginationTest(RecipesTestCase):
+    """Поиск — только с постраничной пагинацией."""
+
+    def test_cursor_with_search_rejected(self):
+        for cursor in ("", "cD0yMDI0"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    "/api/recipes/", {"search": "Рецепт", "cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.data)
+
+    def test_search_with_pages(self):
+        response = self.client.get(
+            "/api/recipes/", {"search": "Рецепт", "page": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_cursor_with_empty_search(self):
+        response = self.client.get(
+            "/api/recipes/", {"search": "", "cursor": ""})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+
+
+class IngredientIndexTest(RecipesTestCase):
+    """Индекс в памяти видит изменения, сделанные другим процессом."""
+
+    def search(self, name):
+        response = self.client.get("/api/ingredients/", {"name": name})
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.data]
+
+    def test_rebuilt_on_shared_version_change(self):
+        self.assertEqual(self.search("Мука"), [])
+        with self.assertNumQueries(1):
+            self.search("Ингредиент 1")
+        # Другой процесс: без сигналов этого процесса, только версия в БД.
+        Ingredient.objects.bulk_create(
+            [Ingredient(name="Мука", measurement_unit="г")])
+        versions.bump(versions.INGREDIENTS)
+        self.assertEqual(self.search("Мука"), ["Мука"])
+
+
+class ShortLinkCacheTest(RecipesTestCase):
+    def setUp(self):
+        short_links.cache.clear()
+        self.code = short_links.get_code(self.recipe)
+        self.assertEqual(short_links.resolve(self.code), self.recipe.pk)
+
+    def test_admin_edit_invalidates_cache(self):
+        link = ShortLink.objects.get(code=self.code)
+        link.code = "newcode1"
+        link.save()
+        self.assertIsNone(short_links.resolve(self.code))
+        self.assertEqual(short_links.resolve("newcode1"), self.recipe.pk)
+
+    def test_other_process_change_expires(self):
+        other = create_recipe(self.user, {})
+        # Изменение в другом процессе: сигналы здесь не срабатывают.
+        ShortLink.objects.filter(code=self.code).update(recipe=other)
+        self.assertEqual(short_links.resolve(self.code), self.recipe.pk)
+        with mock.patch.object(short_links.cache, "ttl", 0):
+            short_links.cache.set(self.code, self.recipe.pk)
+            self.assertEqual(short_links.resolve(self.code), other.pk)
+
+
+class RecipeCreateTest(RecipesTestCase):
+    def setUp(self):
+        self.client.force_authenticate(self.author)
+
+    def post_recipe(self, ingredient_ids, tag_ids):
+        return self.client.post(
+            "/api/recipes/",
+            {
+                "name": "Новый рецепт",
+                "text": "Описание",
+                "cooking_time": 5,
+                "image": make_image(),
+                "tags": tag_ids,
+                "ingredients": [
+                    {"id": ingredient_id, "amount": 10}
+                    for ingredient_id in ingredient_ids
+                ],
+            },
+            format="json",
+        )
+
+    def test_queries_do_not_depend_on_ingredient_count(self):
+        tag_ids = [tag.pk for tag in self.tags]
+        for count in (2, 30):
+            with self.subTest(ingredients=count):
+                with self.assertNumQueries(19):
+                    response = self.post_recipe(
+                        [ingredient.pk for ingredient in
+                         self.ingredients[:count]],
+                        tag_ids,
+                    )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    len(response.data["ingredients"]), count)
+
+    def test_unknown_ids_reported_together(self):
+        with self.assertNumQueries(2):
+            response = self.post_recipe(
+                [self.ingredients[0].pk, 99998, 99999],
+                [self.tags[0].pk, 99997],
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["ingredients"],
+            ["Ингредиенты не найдены: 99998, 99999."],
+        )
+        self.assertEqual(response.data["tags"], ["Теги не найдены: 99997."])
+
+
+class RecipeUpdateTest(RecipesTestCase):
+    """PATCH меняет только то, что изменилось."""
+
+    def setUp(self):
+        self.client.force_authenticate(self.author)
+        self.image = make_image()
+        self.payload = {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 5,
+            "image": self.image,
+            "tags": [tag.pk for tag in self.tags[:2]],
+            "ingredients": [
+                {"id": ingredient.pk, "amount": 10}
+                for ingredient in self.ingredients[:3]
+            ],
+        }
+        response = self.client.post(
+            "/api/recipes/", self.payload, format="json")
+        self.recipe = Recipe.objects.get(pk=response.data["id"])
+
+    def patch(self, **changes):
+        return self.client.patch(
+            f"/api/recipes/{self.recipe.pk}/",
+            {**self.payload, **changes},
+            format="json",
+        )
+
+    def test_title_change_skips_related_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(name="Новое название")
+        self.assertEqual(response.status_code, 200)
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        for table in (
+            IngredientInRecipe._meta.db_table,
+            Recipe.tags.through._meta.db_table,
+        ):
+            self.assertFalse(
+                [sql for sql in writes if f'"{table}"' in sql], table)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, "Новое название")
+
+    def test_same_image_is_not_saved_again(self):
+        image_name = self.recipe.image.name
+        response = self.patch(name="Новое название")
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, image_name)
+
+    def test_missing_stored_image(self):
+        default_storage.delete(self.recipe.image.name)
+        response = self.patch(image=make_image((10, 20, 30)))
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertTrue(default_storage.exists(self.recipe.image.name))
+
+
+class RenditionJobTest(RecipesTestCase):
+    def get_jobs(self):
+        return list(
+            Job.objects.filter(name="recipes.generate_renditions")
+            .order_by("pk").values_list("payload__name", flat=True)
+        )
+
+    def test_enqueued_only_for_new_image(self):
+        self.assertEqual(self.get_jobs(), [IMAGE_NAME])
+        self.recipe.name = "Новое название"
+        self.recipe.save()
+        self.recipe.save(update_fields=["image"])
+        self.assertEqual(self.get_jobs(), [IMAGE_NAME])
+        self.recipe.image = "recipes/images/other.jpg"
+        self.recipe.save()
+        self.assertEqual(
+            self.get_jobs(), [IMAGE_NAME, "recipes/images/other.jpg"])
+
+
+class FeedTest(RecipesTestCase):
+    """Ленту заполняют фоновые задачи, а не запрос."""
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def run_timeline_jobs(self):
+        jobs = Job.objects.filter(
+            name__in=["recipes.fan_out", "recipes.backfill_timeline"],
+            status=Job.QUEUED,
+        )
+        for job in jobs.order_by("pk"):
+            queue.registry[job.name](job=job, **job.payload)
+
+    def get_feed(self, **params):
+        response = self.client.get("/api/recipes/feed/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_fan_out_in_jobs(self):
+        Subscription.objects.create(user=self.user, author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.run_timeline_jobs()
+        newer = create_recipe(self.author, {}, name="Новый рецепт")
+        self.assertEqual(TimelineEntry.objects.count(), 1)
+        self.run_timeline_jobs()
+        self.assertEqual(
+            [row["id"] for row in self.get_feed()["results"]],
+            [newer.pk, self.recipe.pk],
+        )
+        page = self.get_feed(cursor="", limit=1)
+        self.assertEqual([row["id"] for row in page["results"]], [newer.pk])
+        response = self.client.get(page["next"])
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]],
+            [self.recipe.pk],
+        )
+
+    def test_backfill_after_unsubscribe(self):
+        Subscription.objects.create(
+            user=self.user, author=self.author).delete()
+        self.run_timeline_jobs()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+
+class AsyncViewErrorTest(RecipesTestCase):
+    """Ошибки асинхронного пути не повторяются синхронным путём."""
+
+    def make_view(self, async_view, view_class, actions=None):
+        view = async_view.as_view(view_class, actions)
+        view.view_initkwargs["sync_view"] = mock.Mock(
+            side_effect=AssertionError("Запрос передан синхронному пути"))
+        return view
+
+    async def assertSameAsSync(self, response, sync_view, request, **kwargs):
+        expected = await sync_to_async(sync_view)(request, **kwargs)
+        expected.render()
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(
+            response.get("WWW-Authenticate"),
+            expected.get("WWW-Authenticate"),
+        )
+
+    async def test_not_found(self):
+        view = self.make_view(
+            RecipeAsyncView, RecipeViewSet, {"get": "retrieve"})
+        request = AsyncRequestFactory().get("/api/recipes/99999/")
+        response = await view(request, pk=99999)
+        self.assertEqual(response.status_code, 404)
+        await self.assertSameAsSync(
+            response, RecipeViewSet.as_view({"get": "retrieve"}),
+            AsyncRequestFactory().get("/api/recipes/99999/"), pk=99999,
+        )
+
+    async def test_not_authenticated(self):
+        view = self.make_view(SubscriptionsAsyncView, SubscriptionsListView)
+        response = await view(
+            AsyncRequestFactory().get("/api/users/subscriptions/"))
+        self.assertEqual(response.status_code, 401)
+        await self.assertSameAsSync(
+            response, SubscriptionsListView.as_view(),
+            AsyncRequestFactory().get("/api/users/subscriptions/"),
+        )
+
+    async def test_invalid_token(self):
+        view = self.make_view(RecipeAsyncView, RecipeViewSet, {"get": "list"})
+        headers = {"Authorization": "Token invalid"}
+        response = await view(
+            AsyncRequestFactory().get("/api/recipes/", headers=headers))
+        self.assertEqual(response.status_code, 401)
+        await self.assertSameAsSync(
+            response, RecipeViewSet.as_view({"get": "list"}),
+            AsyncRequestFactory().get("/api/recipes/", headers=headers),
+        )
+
+
+class RecipeRowsSerializerTest(RecipesTestCase):
+    """Быстрый путь списков отдаёт тот же JSON, что и DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author.avatar = "users/avatars/author.png"
+        cls.author.save()
+        cls.other = create_recipe(
+            cls.user,
+            {
+                cls.ingredients[5]: 3,
+                cls.ingredients[2]: 1,
+                cls.ingredients[9]: 250,
+            },
+            cls.tags[::-1],
+            name="Другой рецепт",
+        )
+        cls.second = create_recipe(
+            cls.author, {cls.ingredients[7]: 40}, name="Второй рецепт")
+        Subscription.objects.create(user=cls.user, author=cls.author)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.other)
+
+    def render(self, user, params):
+        request = Request(APIRequestFactory().get("/api/recipes/", params))
+        if user is not None:
+            request.user = user
+        view = RecipeViewSet(
+            request=request, action="list", format_kwarg=None, kwargs={})
+        context = view.get_serializer_context()
+        queryset = view.get_queryset()
+        return (
+            JSONRenderer().render(RecipeReadSerializer(
+                list(queryset), many=True, context=context).data),
+            JSONRenderer().render(RecipeRowsSerializer(
+                list(view.get_rows(queryset)), context=context).data),
+        )
+
+    def test_same_json(self):
+        for user in (None, self.user):
+            for params in ({}, {"srcset": 1}):
+                with self.subTest(user=user, params=params):
+                    expected, content = self.render(user, params)
+                    self.assertEqual(content, expected)
+        for flag in ("is_subscribed", "is_favorited", "is_in_shopping_cart"):
+            self.assertIn(f'"{flag}":true'.encode(), content)
@@ -0,0 +1,58 @@
+"""
+Ленты подписок с записью при публикации (fan-out on write).
+
+Для каждого подписчика хранится TimelineEntry на каждый рецепт
+авторов, на которых он подписан. Записи добавляются фоновыми
+задачами (recipes.fan_out, recipes.backfill_timeline) после создания
+рецепта и после подписки, чтобы запрос не рос с числом подписчиков;
+удаляются при отписке и вместе с рецептом.
+"""
+from .models import Recipe, TimelineEntry
+from users.models import Subscription
+
+BATCH_SIZE = 1000
+
+
+def _create(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(recipe):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    followers = Subscription.objects.filter(
+        author_id=recipe.author_id
+    ).values_list("user_id", flat=True)
+    _create(
+        TimelineEntry(
+            follower_id=follower_id,
+            recipe_id=recipe.pk,
+            author_id=recipe.author_id,
+            pub_date=recipe.pub_date,
+        )
+        for follower_id in followers.iterator()
+    )
+
+
+def backfill(follower_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные рецепты автора."""
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        "pk", "pub_date"
+    )
+    _create(
+        TimelineEntry(
+            follower_id=follower_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for recipe_id, pub_date in recipes.iterator()
+    )
+
+
+def trim(follower_id, author_id):
+    """Убирает рецепты автора из ленты бывшего подписчика."""
+    TimelineEntry.objects.filter(
+        follower_id=follower_id, author_id=author_id
+    ).delete()
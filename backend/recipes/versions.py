@@ -0,0 +1,39 @@
+"""Версии справочников (тегов и ингредиентов) для ETag/Last-Modified."""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogVersion
+
+TAGS = "tag"
+INGREDIENTS = "ingredient"
+
+
+def bump(name):
+    updated = CatalogVersion.objects.filter(name=name).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        CatalogVersion.objects.get_or_create(
+            name=name, defaults={"version": 1})
+
+
+def get_versions(*names):
+    """{name: (version, updated_at)} для запрошенных справочников."""
+    versions = dict.fromkeys(names, (0, None))
+    versions.update(
+        (name, (version, updated_at))
+        for name, version, updated_at in CatalogVersion.objects.filter(
+            name__in=names
+        ).values_list("name", "version", "updated_at")
+    )
+    return versions
+
+
+async def aget_versions(*names):
+    """Асинхронный вариант get_versions()."""
+    versions = dict.fromkeys(names, (0, None))
+    async for name, version, updated_at in CatalogVersion.objects.filter(
+        name__in=names
+    ).values_list("name", "version", "updated_at"):
+        versions[name] = (version, updated_at)
+    return versions
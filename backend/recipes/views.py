@@ -1,27 +1,34 @@
-import hashlib
-
-from django.conf import settings
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db.models import Exists, F, OuterRef, Value
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status
+from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from core.filters import IngredientFilter, RecipeFilter
+from api.serializers import get_subscribed_author_ids
+from core.conditional import ConditionalGetMixin, make_etag
+from core.filters import IngredientFilter, RecipeFilter, RecipeSearchFilter
+from core.pagination import LimitPageOrCursorPagination
 from core.permissions import IsAuthorOrReadOnly
 
-from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
+from . import short_links, versions
+from .exports import EXPORT_FORMATS, PDF_FORMAT, get_rows
+from .ingredient_index import ingredient_index
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 from .serializers import (IngredientSerializer, RecipeReadSerializer,
-                          RecipeWriteSerializer, ShortRecipeSerializer,
-                          TagSerializer)
+                          RecipeRowsSerializer, RecipeWriteSerializer,
+                          ShortRecipeSerializer, TagSerializer)
+from jobs.models import Job
+from jobs.queue import enqueue
+from jobs.serializers import JobSerializer
+from users.models import Subscription
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
@@ -29,21 +36,66 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name")
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        # Автодополнение обслуживается индексом в памяти, без запроса к БД:
+        # версия справочника уже прочитана для ETag.
+        return self.conditional(
+            lambda *args, **kwargs: Response(
+                ingredient_index.search(name, self.catalog_version)),
+            request, *args, **kwargs
+        )
+
+    def get_validators(self, request, *args, **kwargs):
+        return self.make_validators(
+            request, versions.get_versions(versions.INGREDIENTS), **kwargs)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        return self.make_validators(
+            request, await versions.aget_versions(versions.INGREDIENTS),
+            **kwargs
+        )
+
+    def make_validators(self, request, catalogs, **kwargs):
+        version, updated_at = catalogs[versions.INGREDIENTS]
+        self.catalog_version = version
+        return (
+            make_etag(version, kwargs.get("pk"), request.GET.urlencode()),
+            updated_at,
+        )
+
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
     pagination_class = None
 
+    def get_validators(self, request, *args, **kwargs):
+        return self.make_validators(
+            versions.get_versions(versions.TAGS), **kwargs)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        return self.make_validators(
+            await versions.aget_versions(versions.TAGS), **kwargs)
+
+    def make_validators(self, catalogs, **kwargs):
+        version, updated_at = catalogs[versions.TAGS]
+        return make_etag(version, kwargs.get("pk")), updated_at
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(ConditionalGetMixin, ModelViewSet):
     queryset = Recipe.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RecipeSearchFilter]
     filterset_class = RecipeFilter
     search_fields = ["name", "author__id"]
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    pagination_class = LimitPageOrCursorPagination
+    cursor_ordering = ("-pub_date", "-id")
+    conditional_actions = ("retrieve",)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -51,17 +103,143 @@ class RecipeViewSet(ModelViewSet):
         return RecipeWriteSerializer
 
     def get_queryset(self):
-        return Recipe.objects.prefetch_related(
-            "tags", "ingredient_links__ingredient"
+        # Теги и ингредиенты догружает RecipeReadSerializer
+        # только для рецептов, которых нет в кеше, а в списках —
+        # RecipeRowsSerializer.
+        queryset = Recipe.objects.select_related("author")
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
+
+    def get_validator_row(self, pk):
+        """Запрос одной строки с полями, от которых зависит ETag."""
+        return self.get_queryset().filter(pk=pk).values_list(
+            "updated_at",
+            "author_id",
+            "author__email",
+            "author__username",
+            "author__first_name",
+            "author__last_name",
+            "author__avatar",
+            "is_favorited",
+            "is_in_shopping_cart",
+        )
+
+    def get_validators(self, request, *args, **kwargs):
+        try:
+            row = self.get_validator_row(kwargs["pk"]).first()
+        except (TypeError, ValueError):
+            return None, None
+        if row is None:
+            return None, None
+        return self.make_validators(
+            request,
+            row,
+            versions.get_versions(versions.TAGS, versions.INGREDIENTS),
+            row[1] in get_subscribed_author_ids(request),
+        )
+
+    async def aget_validators(self, request, *args, **kwargs):
+        try:
+            row = await self.get_validator_row(kwargs["pk"]).afirst()
+        except (TypeError, ValueError):
+            return None, None
+        if row is None:
+            return None, None
+        user = request.user
+        return self.make_validators(
+            request,
+            row,
+            await versions.aget_versions(versions.TAGS, versions.INGREDIENTS),
+            user.is_authenticated
+            and await Subscription.objects.filter(
+                user=user, author_id=row[1]
+            ).aexists(),
         )
 
+    def make_validators(self, request, row, catalogs, is_subscribed):
+        """
+        ETag рецепта: дата изменения, поля автора, флаги пользователя
+        и версии справочников тегов и ингредиентов.
+
+        Last-Modified отдаётся только анонимным пользователям: флаги
+        избранного и корзины меняются без изменения самого рецепта.
+        """
+        etag = make_etag(
+            *row,
+            is_subscribed,
+            request.user.pk,
+            *(version for version, _ in catalogs.values()),
+        )
+        if request.user.is_authenticated:
+            return etag, None
+        return etag, max(
+            [row[0]]
+            + [changed for _, changed in catalogs.values() if changed]
+        )
+
+    def get_cursor_ordering(self):
+        if self.action == "feed":
+            # Порядок совпадает с индексом timeline_follower_date_idx.
+            return ("-feed_date", "-id")
+        return self.cursor_ordering
+
+    def get_rows(self, queryset):
+        """
+        Строки values() для RecipeRowsSerializer. Поля порядка
+        курсора нужны курсорной пагинации.
+        """
+        return queryset.values(*dict.fromkeys((
+            *RecipeRowsSerializer.row_fields,
+            *(field.lstrip("-") for field in self.get_cursor_ordering()),
+        )))
+
+    def render_rows(self, rows):
+        return RecipeRowsSerializer(
+            rows, context=self.get_serializer_context()).data
+
+    def list_rows(self, queryset):
+        rows = self.get_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(self.render_rows(rows))
+        return self.get_paginated_response(self.render_rows(page))
+
+    def list(self, request, *args, **kwargs):
+        return self.list_rows(self.filter_queryset(self.get_queryset()))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        queryset = (
+            self.get_queryset()
+            .filter(timeline_entries__follower=request.user)
+            .annotate(feed_date=F("timeline_entries__pub_date"))
+            .order_by(*self.get_cursor_ordering())
+        )
+        return self.list_rows(queryset)
+
     @action(detail=True, methods=["get"], url_path="get-link")
     def short_link(self, request, pk=None):
         recipe = self.get_object()
-        hash_val = hashlib.md5(
-            f"{settings.SECRET_KEY}{recipe.id}".encode()
-        ).hexdigest()[:8]
-        short_url = request.build_absolute_uri(f"/r/{hash_val}/")
+        short_url = request.build_absolute_uri(
+            reverse("short-link", args=[short_links.get_code(recipe)])
+        )
         return Response({"short-link": short_url})
 
 
@@ -105,27 +283,57 @@ class ShoppingCartView(AddRemoveRecipeBaseView):
 class DownloadCartView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= выбирает формат файла, а не рендерер DRF.
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
-        recipes_in_cart = ShoppingCart.objects.filter(
-            user=request.user).values_list(
-                "recipe", flat=True
+        export_format = request.query_params.get("format", "txt")
+        if export_format == PDF_FORMAT:
+            return self.export_pdf(request)
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {
+                    "errors": "Неизвестный формат. Доступны: "
+                    + ", ".join([*EXPORT_FORMATS, PDF_FORMAT])
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        content_type, export = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export(get_rows(request.user)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_cart.{export_format}"'
         )
+        return response
 
-        ingredients = (
-            IngredientInRecipe.objects.filter(recipe__in=recipes_in_cart)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total=Sum("amount"))
-            .order_by("ingredient__name")
+    def export_pdf(self, request):
+        """
+        PDF строит фоновая задача: отвечаем 202 с задачей, ссылка
+        на файл появится в её result (GET /api/jobs/<id>/). Задача,
+        ещё ждущая в очереди, переиспользуется.
+        """
+        job = Job.objects.filter(
+            user=request.user,
+            name="recipes.export_shopping_list",
+            status=Job.QUEUED,
+        ).first() or enqueue(
+            "recipes.export_shopping_list",
+            user=request.user,
+            user_id=request.user.pk,
+        )
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("job_status", args=[job.pk])},
         )
 
-        lines = [
-            f"{item['ingredient__name']}"
-            f" ({item['ingredient__measurement_unit']}) — {item['total']}"
-            for item in ingredients
-        ]
-        content = "\n".join(lines)
 
-        response = HttpResponse(content, content_type="text/plain")
-        response["Content-Disposition"] = ("attachment;"
-                                           ' filename="shopping_cart.txt"')
-        return response
+def short_link_redirect(request, code):
+    """Переход по короткой ссылке на страницу рецепта."""
+    recipe_id = short_links.resolve(code)
+    if recipe_id is None:
+        raise Http404
+    return redirect(f"/recipes/{recipe_id}")
@@ -6,7 +6,16 @@ from .models import CustomUser, Subscription
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
-    list_display = ("email", "username", "first_name", "last_name", "is_staff")
+    list_display = (
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "recipes_count",
+        "followers_count",
+        "is_staff",
+    )
+    readonly_fields = ("recipes_count", "followers_count")
     list_filter = ("is_staff", "is_superuser", "is_active")
     search_fields = ("email", "username", "first_name", "last_name")
     ordering = ("email",)
@@ -17,6 +26,7 @@ class CustomUserAdmin(UserAdmin):
             "Personal info",
             {"fields": ("username", "first_name", "last_name", "avatar")},
         ),
+        ("Statistics", {"fields": ("recipes_count", "followers_count")}),
         (
             "Permissions",
             {
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 17:04
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def reconcile_counter(model, field, related_model, related_field):
+    # Копия запроса на момент миграции, без импорта кода приложения.
+    actual = Coalesce(
+        Subquery(
+            related_model.objects.filter(**{related_field: OuterRef("pk")})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    model.objects.annotate(actual=actual).exclude(
+        **{field: F("actual")}).update(**{field: actual})
+
+
+def fill_counters(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    Recipe = apps.get_model("recipes", "Recipe")
+    Subscription = apps.get_model("users", "Subscription")
+    reconcile_counter(CustomUser, "recipes_count", Recipe, "author")
+    reconcile_counter(CustomUser, "followers_count", Subscription, "author")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="followers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="followers count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="recipes count"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
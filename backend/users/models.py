@@ -3,9 +3,10 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 from core.constatns import MAX_EMAIL_LENGTH, MAX_USER_NAME_LENGTH
+from core.counters import CounterFieldsMixin
 
 
-class CustomUser(AbstractUser):
+class CustomUser(CounterFieldsMixin, AbstractUser):
     email = models.EmailField(
         "email",
         unique=True,
@@ -17,6 +18,12 @@ class CustomUser(AbstractUser):
     avatar = models.ImageField(
         "avatar", upload_to="users/avatars/", blank=True, null=True
     )
+    recipes_count = models.PositiveIntegerField(
+        "recipes count", default=0, editable=False)
+    followers_count = models.PositiveIntegerField(
+        "followers count", default=0, editable=False)
+
+    counter_fields = ("recipes_count", "followers_count")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name", "password"]
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import renditions
+from core.counters import change_counter
+
+from .models import CustomUser, Subscription
+from jobs.queue import enqueue
+
+
+@receiver(pre_save, sender=CustomUser)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._avatar_changed = renditions.is_file_changed(
+        instance, "avatar", update_fields)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, **kwargs):
+    if getattr(instance, "_avatar_changed", False) and instance.avatar:
+        enqueue(
+            "users.generate_avatar_renditions", name=instance.avatar.name)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            CustomUser, instance.author_id, "followers_count", 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_removed(sender, instance, **kwargs):
+    change_counter(CustomUser, instance.author_id, "followers_count", -1)
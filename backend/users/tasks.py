@@ -0,0 +1,8 @@
+from core import renditions
+
+from jobs.queue import task
+
+
+@task("users.generate_avatar_renditions")
+def generate_avatar_renditions(job, name):
+    return renditions.generate(name)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from jobs.models import Job
+
+User = get_user_model()
+
+
+class AvatarRenditionJobTest(TestCase):
+    def get_jobs(self):
+        return list(
+            Job.objects.filter(name="users.generate_avatar_renditions")
+            .order_by("pk").values_list("payload__name", flat=True)
+        )
+
+    def test_enqueued_only_for_new_avatar(self):
+        user = User.objects.create_user(
+            email="user@example.com",
+            username="user",
+            first_name="Имя",
+            last_name="Фамилия",
+            password="test-password-123",
+            avatar="users/avatars/first.png",
+        )
+        self.assertEqual(self.get_jobs(), ["users/avatars/first.png"])
+        user.set_password("another-password-456")
+        user.save()
+        user.first_name = "Другое"
+        user.save()
+        self.assertEqual(self.get_jobs(), ["users/avatars/first.png"])
+        user.avatar = "users/avatars/second.png"
+        user.save(update_fields=["avatar"])
+        self.assertEqual(
+            self.get_jobs(),
+            ["users/avatars/first.png", "users/avatars/second.png"],
+        )